@@ -0,0 +1,156 @@
+"""
+batch.py — Batch Solving of Grid Files
+--------------------------------------
+This script solves many grid files with one solver and streams the results, one JSON line per grid:
+
+    python batch.py ../input/ --solver optimal --processes 4 --output results.jsonl
+
+The files (directories, file names or glob patterns) are solved in a pool of processes, each worker setting up
+its solver once. At most a fixed number of files are in flight at any time, so that the memory stays bounded,
+and the lines are written in the order of the files as soon as they are available.
+
+Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mokline & Olivier de Boissieu
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from grid import Grid, BINARY_MAGIC
+from solver import SolverGreedy, SolverPathGrowing, SolverMaxWeightMatching, SolverMaxWeightMatching2
+
+# Solver class and options of each solver name. The files are already solved in parallel, so the optimal
+# solver does not start its own pool of processes.
+SOLVERS = {
+    "greedy": (SolverGreedy, {}),
+    "greedy-improved": (SolverGreedy, {"improvement_passes": 10}),
+    "path-growing": (SolverPathGrowing, {}),
+    "optimal": (SolverMaxWeightMatching, {"parallel_threshold": float("inf")}),
+    "variant": (SolverMaxWeightMatching2, {}),
+}
+
+# Solver of the current worker process, set once by _init_worker
+_worker_solver = None
+
+
+def grid_files(paths):
+    """
+    Returns the grid files designated by paths (directories, whose .in files are taken, file names or glob
+    patterns), each group sorted by name.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, "*.in")))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            files += sorted(glob.glob(path))
+    return files
+
+
+def _load(file_name):
+    """
+    Loads a grid file, in the binary format if it starts with BINARY_MAGIC and in the text format otherwise.
+    """
+    with open(file_name, "rb") as file:
+        binary = file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+    if binary:
+        return Grid.grid_from_binary_file(file_name)
+    return Grid.grid_from_file(file_name, read_values=True)
+
+
+def _init_worker(solver):
+    """
+    Sets up the solver of a worker process.
+    """
+    global _worker_solver
+    _worker_solver = SOLVERS[solver]
+
+
+def solve_file(file_name, solver=None):
+    """
+    Loads and solves a grid file.
+
+    Parameters:
+    -----------
+    file_name: str
+        The grid file (.in, or binary if it starts with the binary magic)
+    solver: str
+        Name of the solver in SOLVERS, by default the one of the worker process
+
+    Output:
+    -------
+    result: dict
+        The file name, the size of the grid, the score, the number of pairs and the load and solve times in
+        seconds, or the file name and the error if the file could not be solved
+    """
+    solver_class, options = _worker_solver if solver is None else SOLVERS[solver]
+    try:
+        start = time.perf_counter()
+        grid = _load(file_name)
+        loaded = time.perf_counter()
+        instance = solver_class(grid, **options)
+        instance.run()
+        score = instance.score()
+        solved = time.perf_counter()
+    except Exception as error:
+        return {"file": file_name, "error": str(error)}
+    return {"file": file_name, "n": grid.n, "m": grid.m, "score": score, "pairs": len(instance.pairs),
+            "load_time": round(loaded - start, 6), "solve_time": round(solved - loaded, 6)}
+
+
+def solve_files(files, solver="optimal", processes=None, window=None):
+    """
+    Solves the grid files in a pool of processes and yields their results (see solve_file) in the order of files.
+
+    Parameters:
+    -----------
+    files: list[str]
+        The grid files
+    solver: str
+        Name of the solver in SOLVERS
+    processes: int
+        Number of worker processes, by default one per core
+    window: int
+        Maximal number of files in flight, by default 4 per worker
+    """
+    if solver not in SOLVERS:
+        raise Exception(f"Unknown solver {solver}")
+    processes = processes or os.cpu_count() or 1
+    window = window or 4 * processes
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(solver,)) as pool:
+        pending = deque()
+        for file_name in files:
+            if len(pending) >= window:
+                yield pending.popleft().result()
+            pending.append(pool.submit(solve_file, file_name))
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve grid files and write one JSON line per grid.")
+    parser.add_argument("paths", nargs="+", help="directories, grid files or glob patterns")
+    parser.add_argument("--solver", default="optimal", choices=sorted(SOLVERS))
+    parser.add_argument("--processes", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--output", default=None, help="output file (standard output by default)")
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for result in solve_files(grid_files(args.paths), args.solver, args.processes):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
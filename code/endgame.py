@@ -0,0 +1,248 @@
+"""
+endgame.py — Exact Endgame Solver for the Two-Player Game
+----------------------------------------------------------
+This module defines the Endgame class, which computes the exact value of the end of a game when few cells can
+still be paired. The Minmax search hands over to it below a number of cells (Minmax.endgame_cells), when these
+cells split into several components.
+
+The free cells that can still be paired split into components: groups of cells linked by the pairs that can be
+played. A move only changes its own component, which it splits into smaller ones. The value of the position is
+not the sum of the values of the components (the players alternate over all of them, so who moves first in each
+one depends on the others), but it only depends on the multiset of the components and on the player to move.
+Each component is replaced by a canonical form, its pairs and their costs up to translation, rotation and
+reflection of the grid, and the values are memoized by sorted tuple of canonical forms. This merges the positions
+that differ only by the order of the moves, by the place of the components on the grid or by their orientation,
+and the moves of identical components are only searched once. The positions are searched by alpha-beta, so the
+memo holds a lower and an upper bound of each value, equal once the value is known exactly. The memos are bounded
+like the transposition table of Minmax: when a memo is full, its oldest entry is evicted.
+
+Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mokline & Olivier de Boissieu
+"""
+
+MEMO_SIZE = 1 << 20
+
+# Rotations and reflections of the grid, as matrices (a, b, c, d) mapping (i, j) to (a * i + b * j, c * i + d * j)
+SYMMETRIES = ((1, 0, 0, 1), (1, 0, 0, -1), (-1, 0, 0, 1), (-1, 0, 0, -1),
+              (0, 1, 1, 0), (0, 1, -1, 0), (0, -1, 1, 0), (0, -1, -1, 0))
+
+
+def store(memo, key, value, size):
+    """
+    Stores an entry in a bounded memo (a dict in insertion order, such as the transposition table of Minmax),
+    evicting the oldest entry if the memo already holds size entries. Returns value.
+    """
+    if key in memo:
+        del memo[key]
+    elif memo and len(memo) >= size:
+        del memo[next(iter(memo))]
+    memo[key] = value
+    return value
+
+
+def canonical(pairs):
+    """
+    Returns the canonical form of a component: the smallest, over the symmetries of the grid, sorted tuple of its
+    pairs ((cell1, cell2), cost), the cells being translated so that the smallest line and column are 0.
+
+    Parameters:
+    -----------
+    pairs: list[tuple]
+        The pairs ((i1, j1), (i2, j2)) and their costs, as ((cell1, cell2), cost)
+    """
+    if len(pairs) == 1:
+        return ((((0, 0), (0, 1)), pairs[0][1]),)
+    best = None
+    for a, b, c, d in SYMMETRIES:
+        moved = [(a * i1 + b * j1, c * i1 + d * j1, a * i2 + b * j2, c * i2 + d * j2, cost)
+                 for ((i1, j1), (i2, j2)), cost in pairs]
+        i0 = min(min(i1, i2) for i1, _, i2, _, _ in moved)
+        j0 = min(min(j1, j2) for _, j1, _, j2, _ in moved)
+        form = []
+        for i1, j1, i2, j2, cost in moved:
+            c1, c2 = (i1 - i0, j1 - j0), (i2 - i0, j2 - j0)
+            form.append(((c1, c2) if c1 < c2 else (c2, c1), cost))
+        form = tuple(sorted(form))
+        if best is None or form < best:
+            best = form
+    return best
+
+
+def components(pairs):
+    """
+    Splits pairs ((cell1, cell2), cost) into the components they link and returns the sorted tuple of the
+    canonical forms of the components.
+    """
+    incident = {}
+    for index, ((c1, c2), _) in enumerate(pairs):
+        incident.setdefault(c1, []).append(index)
+        incident.setdefault(c2, []).append(index)
+    seen = [False] * len(pairs)
+    forms = []
+    for start in range(len(pairs)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        stack, group = [start], []
+        while stack:
+            index = stack.pop()
+            group.append(pairs[index])
+            for cell in pairs[index][0]:
+                for other in incident[cell]:
+                    if not seen[other]:
+                        seen[other] = True
+                        stack.append(other)
+        forms.append(canonical(group))
+    return tuple(sorted(forms))
+
+
+class Endgame:
+    """
+    Exact solver of the end of a game, with the values memoized by canonical multiset of components.
+
+    Attributes:
+    -----------
+    bounds: dict
+        (sorted tuple of canonical components, True if the AI is to move) -> (lower bound, upper bound) of the
+        value of the rest of the game, the sum of the costs of the opponent's pairs minus the sum of the costs of
+        the AI's pairs (the two bounds are equal once the value is known exactly)
+    moves: dict
+        Canonical component -> list of the distinct moves of the component, as (cost, canonical components left)
+    forms: dict
+        Mask of the cells of a component of the grid -> canonical form of the component
+    All three are in insertion order and hold at most memo_size entries.
+    """
+
+    def __init__(self, board, pairs, memo_size=MEMO_SIZE):
+        """
+        Parameters:
+        -----------
+        board: Bitboard
+            Bitboard of the grid, whose partners, masks and costs are used
+        pairs: list[tuple[tuple[int]]]
+            The pairs of the grid, in the order of the indices of board
+        memo_size: int
+            Maximal number of entries of each memo
+        """
+        self.board = board
+        self.pairs = pairs
+        self.memo_size = memo_size
+        self.incident = [[] for _ in board.partners]
+        for k, mask in enumerate(board.masks):
+            cell = (mask & -mask).bit_length() - 1
+            self.incident[cell].append(k)
+            self.incident[(mask ^ (1 << cell)).bit_length() - 1].append(k)
+        self.bounds = {}
+        self.moves = {}
+        self.forms = {}
+
+    def split(self, active):
+        """
+        Returns the masks of the components of the cells of the mask active, each cell of which must be in a pair
+        that can be played.
+        """
+        partners, masks = self.board.partners, []
+        while active:
+            component = frontier = active & -active
+            while frontier:
+                bit = frontier & -frontier
+                frontier ^= bit
+                new = partners[bit.bit_length() - 1] & active & ~component
+                component |= new
+                frontier |= new
+            active &= ~component
+            masks.append(component)
+        return masks
+
+    def position(self, masks):
+        """
+        Returns the position of the components of masks: the sorted tuple of their canonical forms.
+        """
+        forms = []
+        for mask in masks:
+            form = self.forms.get(mask)
+            if form is None:
+                form = store(self.forms, mask, canonical(self._component_pairs(mask)), self.memo_size)
+            forms.append(form)
+        return tuple(sorted(forms))
+
+    def _component_pairs(self, component):
+        """
+        Returns the pairs ((cell1, cell2), cost) whose two cells are in the mask component.
+        """
+        masks, costs, indices = self.board.masks, self.board.costs, set()
+        cells = component
+        while cells:
+            bit = cells & -cells
+            cells ^= bit
+            indices.update(k for k in self.incident[bit.bit_length() - 1] if masks[k] & component == masks[k])
+        return [(self.pairs[k], costs[k]) for k in sorted(indices)]
+
+    def component_moves(self, component):
+        """
+        Returns the distinct moves of a canonical component as (cost, sorted tuple of the components left).
+        """
+        moves = self.moves.get(component)
+        if moves is None:
+            moves = set()
+            for (c1, c2), cost in component:
+                moves.add((cost, components([pair for pair in component
+                                             if c1 not in pair[0] and c2 not in pair[0]])))
+            moves = store(self.moves, component, sorted(moves), self.memo_size)
+        return moves
+
+    def value(self, position, ai, alpha=float("-inf"), beta=float("inf")):
+        """
+        Returns the exact value of the rest of the game from position (sorted tuple of canonical components),
+        the AI playing first if ai is True, both players playing optimally, if it lies strictly between alpha and
+        beta (otherwise the value returned is a bound beyond alpha or beta, as in Minmax.alphabeta).
+        """
+        if not position:
+            return 0
+        key = (position, ai)
+        lower, upper = self.bounds.get(key, (float("-inf"), float("inf")))
+        if lower == upper or lower >= beta:
+            return lower
+        if upper <= alpha:
+            return upper
+        alpha, beta = max(alpha, lower), min(beta, upper)
+        window = (alpha, beta)
+
+        # Distinct moves of all the components, the cheapest first
+        moves = set()
+        for index, component in enumerate(position):
+            if index and component == position[index - 1]:
+                continue
+            others = position[:index] + position[index + 1:]
+            for cost, rest in self.component_moves(component):
+                moves.add((cost, tuple(sorted(others + rest))))
+
+        if ai:
+            best = float("-inf")
+            for cost, rest in sorted(moves):
+                best = max(best, self.value(rest, False, alpha + cost, beta + cost) - cost)
+                if best >= beta:
+                    break
+                alpha = max(alpha, best)
+        else:
+            best = float("inf")
+            for cost, rest in sorted(moves):
+                best = min(best, self.value(rest, True, alpha - cost, beta - cost) + cost)
+                if best <= alpha:
+                    break
+                beta = min(beta, best)
+
+        if best <= window[0]:
+            upper = min(upper, best)
+        elif best >= window[1]:
+            lower = max(lower, best)
+        else:
+            lower = upper = best
+        store(self.bounds, key, (lower, upper), self.memo_size)
+        return best
+
+    def solve(self, masks, ai, alpha=float("-inf"), beta=float("inf")):
+        """
+        Returns the value of the rest of the game (see value) where masks are the components of the free cells
+        that can still be paired (see split), the AI playing first if ai is True.
+        """
+        return self.value(self.position(masks), ai, alpha, beta)
@@ -0,0 +1,221 @@
+"""
+flow.py — Min Cost Flow Engine
+-------------------------------
+This module implements a min cost flow solver on integer node ids, used by the solvers whose model is
+not a plain matching (e.g. the variant with non-adjacent white pairs).
+
+The algorithm is the successive shortest paths method with Dijkstra and node potentials. Each phase runs
+one Dijkstra, then pushes flow along as many shortest paths as possible (a blocking flow on the arcs of
+reduced cost 0), so the number of phases is about the number of distinct path costs rather than the
+amount of flow. Flow is only pushed while it decreases the total cost.
+
+Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mokline & Olivier de Boissieu
+"""
+
+import heapq
+from collections import deque
+
+import numpy as np
+
+INFINITE_CAPACITY = 1 << 62
+
+
+class MinCostFlow:
+    """
+    A flow network stored as a residual graph in CSR format.
+
+    Attributes:
+    -----------
+    num_nodes: int
+        Number of nodes, which are numbered 0..num_nodes-1
+    num_edges: int
+        Number of edges added with add_edges
+    """
+
+    def __init__(self, num_nodes):
+        """
+        Initializes an empty network with num_nodes nodes.
+        """
+        self.num_nodes = num_nodes
+        self.num_edges = 0
+        self._tails, self._heads, self._capacities, self._costs = [], [], [], []
+        self._built = False
+
+    def add_edges(self, tails, heads, capacities, costs):
+        """
+        Adds the edges tails[k] -> heads[k] with the given capacities and costs (integer arrays or scalars).
+        Use INFINITE_CAPACITY for an uncapacitated edge.
+        """
+        arrays = np.broadcast_arrays(*(np.asarray(x, dtype=np.int64) for x in (tails, heads, capacities, costs)))
+        for stored, array in zip((self._tails, self._heads, self._capacities, self._costs), arrays):
+            stored.append(array.ravel())
+        self.num_edges += arrays[0].size
+        self._built = False
+
+    def _build(self):
+        """
+        Builds the residual graph: the edge k gives the arc 2k (forward) and the arc 2k+1 (backward),
+        the arcs are then grouped by tail node.
+        """
+        tails = np.concatenate(self._tails) if self._tails else np.zeros(0, dtype=np.int64)
+        heads = np.concatenate(self._heads) if self._heads else np.zeros(0, dtype=np.int64)
+        capacities = np.concatenate(self._capacities) if self._capacities else np.zeros(0, dtype=np.int64)
+        costs = np.concatenate(self._costs) if self._costs else np.zeros(0, dtype=np.int64)
+
+        arc_tail = np.empty(2 * self.num_edges, dtype=np.int64)
+        arc_tail[0::2], arc_tail[1::2] = tails, heads
+        arc_head = np.empty_like(arc_tail)
+        arc_head[0::2], arc_head[1::2] = heads, tails
+        arc_capacity = np.zeros_like(arc_tail)
+        arc_capacity[0::2] = capacities
+        arc_cost = np.empty_like(arc_tail)
+        arc_cost[0::2], arc_cost[1::2] = costs, -costs
+
+        # Arcs sorted by tail, position[a] is the index in the sorted order of the arc a
+        order = np.argsort(arc_tail, kind="stable")
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+        indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(arc_tail, minlength=self.num_nodes), out=indptr[1:])
+
+        self._indptr = indptr.tolist()
+        self._head = arc_head[order].tolist()
+        self._cost = arc_cost[order].tolist()
+        self._capacity = arc_capacity[order].tolist()
+        # Reverse arc of each sorted arc (2k <-> 2k+1), in sorted positions
+        self._reverse = position[order ^ 1].tolist()
+        self._forward = position[0::2]
+        self._built = True
+
+    def _initial_potential(self, source):
+        """
+        Shortest distances from source with the (possibly negative) costs, by a queue-based Bellman-Ford.
+        Unreachable nodes get the largest distance found, which keeps every reduced cost used later valid.
+        """
+        indptr, head, cost, capacity = self._indptr, self._head, self._cost, self._capacity
+        dist = [None] * self.num_nodes
+        dist[source] = 0
+        queue = deque([source])
+        in_queue = [False] * self.num_nodes
+        in_queue[source] = True
+        while queue:
+            u = queue.popleft()
+            in_queue[u] = False
+            du = dist[u]
+            for a in range(indptr[u], indptr[u + 1]):
+                if capacity[a] > 0:
+                    v = head[a]
+                    nd = du + cost[a]
+                    if dist[v] is None or nd < dist[v]:
+                        dist[v] = nd
+                        if not in_queue[v]:
+                            in_queue[v] = True
+                            queue.append(v)
+        reached = [d for d in dist if d is not None]
+        top = max(reached) if reached else 0
+        return [top if d is None else d for d in dist]
+
+    def _dijkstra(self, source, sink, potential):
+        """
+        Dijkstra on the reduced costs, stopped as soon as the sink is settled.
+        Returns the distances (None if not settled) and the distance of the sink (None if unreachable).
+        """
+        indptr, head, cost, capacity = self._indptr, self._head, self._cost, self._capacity
+        dist = [None] * self.num_nodes
+        done = [False] * self.num_nodes
+        dist[source] = 0
+        heap = [(0, source)]
+        while heap:
+            du, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = True
+            if u == sink:
+                break
+            pu = potential[u]
+            for a in range(indptr[u], indptr[u + 1]):
+                if capacity[a] > 0:
+                    v = head[a]
+                    if done[v]:
+                        continue
+                    nd = du + cost[a] + pu - potential[v]
+                    if dist[v] is None or nd < dist[v]:
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, v))
+        for u in range(self.num_nodes):
+            if not done[u]:
+                dist[u] = None
+        return dist, dist[sink] if done[sink] else None
+
+    def _blocking_flow(self, source, sink, potential):
+        """
+        Pushes flow along paths made of arcs of reduced cost 0 until none is left (depth-first search with
+        current-arc pointers). Returns the amount of flow pushed.
+        """
+        indptr, head, cost, capacity, reverse = self._indptr, self._head, self._cost, self._capacity, self._reverse
+        current = self._indptr[:-1]
+        dead = [False] * self.num_nodes
+        on_path = [False] * self.num_nodes
+        pushed = 0
+        while True:
+            path = []
+            u = source
+            on_path[source] = True
+            while u != sink:
+                a, end = current[u], indptr[u + 1]
+                pu = potential[u]
+                while a < end:
+                    v = head[a]
+                    if capacity[a] > 0 and not dead[v] and not on_path[v] and cost[a] + pu - potential[v] == 0:
+                        break
+                    a += 1
+                current[u] = a
+                if a < end:
+                    path.append(a)
+                    u = head[a]
+                    on_path[u] = True
+                else:
+                    dead[u] = True
+                    on_path[u] = False
+                    if not path:
+                        return pushed
+                    a = path.pop()
+                    u = head[reverse[a]]
+                    current[u] += 1
+            amount = min(capacity[a] for a in path)
+            for a in path:
+                capacity[a] -= amount
+                capacity[reverse[a]] += amount
+                on_path[head[a]] = False
+            on_path[source] = False
+            pushed += amount
+
+    def run(self, source, sink):
+        """
+        Sends flow from source to sink along successive shortest paths, as long as they have a negative cost.
+
+        Output:
+        -------
+        cost: int
+            The total cost of the flow, which is the minimum cost over all flow values
+        """
+        if not self._built:
+            self._build()
+        potential = self._initial_potential(source)
+        total = 0
+        while True:
+            dist, reach = self._dijkstra(source, sink, potential)
+            if reach is None or reach + potential[sink] - potential[source] >= 0:
+                break
+            path_cost = reach + potential[sink] - potential[source]
+            potential = [p + (reach if d is None or d > reach else d) for p, d in zip(potential, dist)]
+            total += path_cost * self._blocking_flow(source, sink, potential)
+        return total
+
+    def flow(self):
+        """
+        Returns the flow on each edge, in the order in which the edges were added.
+        """
+        # The flow on an edge is the residual capacity of its backward arc
+        backward = np.asarray(self._reverse, dtype=np.int64)[self._forward]
+        return np.asarray(self._capacity, dtype=np.int64)[backward]
@@ -0,0 +1,92 @@
+"""
+generator.py — Seeded Synthetic Grids
+-------------------------------------
+This module generates random grids for tests and scaling studies, reproducibly from a seed. The color of each cell
+is drawn with a given black density and given weights for the four other colors, its value from a given
+distribution. The grids are returned in memory or written in the format read by Grid.grid_from_file:
+
+    python generator.py grid_1000x1000.in --n 1000 --m 1000 --seed 0 --black-density 0.2 --values geometric
+
+Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mokline & Olivier de Boissieu
+"""
+
+import argparse
+
+import numpy as np
+
+from grid import Grid, BLACK
+
+VALUE_DISTRIBUTIONS = ("uniform", "geometric", "constant")
+
+
+def generate_grid(n, m, seed=None, black_density=0.2, color_weights=(1, 1, 1, 1), values="uniform", max_value=10):
+    """
+    Generates a random grid.
+
+    Parameters:
+    -----------
+    n, m: int
+        Size of the grid
+    seed: int
+        Seed of the random generator, the same seed always gives the same grid
+    black_density: float
+        Probability that a cell is black
+    color_weights: tuple[float]
+        Relative weights of the colors white, red, blue and green among the cells that are not black (they may
+        all be 0 only if black_density is 1)
+    values: str
+        Distribution of the values: "uniform" on 1..max_value, "geometric" (P(v) proportional to 2^-v,
+        truncated at max_value) or "constant" (every value is max_value)
+    max_value: int
+        Largest value
+
+    Output:
+    -------
+    grid: Grid
+        The grid
+    """
+    if not 0 <= black_density <= 1 or len(color_weights) != 4 or min(color_weights) < 0 or \
+            (sum(color_weights) == 0 and black_density < 1):
+        raise Exception("Invalid color distribution")
+    if values not in VALUE_DISTRIBUTIONS:
+        raise Exception(f"Unknown value distribution {values}")
+    rng = np.random.default_rng(seed)
+    weights = np.asarray(color_weights, dtype=float)
+    probabilities = np.zeros(5)
+    if weights.sum() > 0:
+        probabilities[:BLACK] = (1 - black_density) * weights / weights.sum()
+    probabilities[BLACK] = black_density
+    color = rng.choice(5, size=(n, m), p=probabilities).astype(np.int8)
+    if values == "uniform":
+        value = rng.integers(1, max_value + 1, size=(n, m))
+    elif values == "geometric":
+        value = np.minimum(rng.geometric(0.5, size=(n, m)), max_value)
+    else:
+        value = np.full((n, m), max_value, dtype=np.int64)
+    return Grid(n, m, color, value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a seeded random grid.")
+    parser.add_argument("file_name", help="output file")
+    parser.add_argument("--n", type=int, required=True, help="number of lines")
+    parser.add_argument("--m", type=int, required=True, help="number of columns")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--black-density", type=float, default=0.2)
+    parser.add_argument("--color-weights", type=float, nargs=4, default=(1, 1, 1, 1),
+                        help="weights of white, red, blue and green")
+    parser.add_argument("--values", default="uniform", choices=VALUE_DISTRIBUTIONS)
+    parser.add_argument("--max-value", type=int, default=10)
+    parser.add_argument("--binary", action="store_true", help="write the binary format (see Grid.to_binary_file)")
+    args = parser.parse_args(argv)
+
+    grid = generate_grid(args.n, args.m, args.seed, args.black_density, tuple(args.color_weights), args.values,
+                         args.max_value)
+    if args.binary:
+        grid.to_binary_file(args.file_name)
+    else:
+        grid.to_file(args.file_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,103 @@
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.colors import ListedColormap
 
+from profiling import NULL_PROFILER
+
 """
 grid.py — Grid Structure and Pair Evaluation Engine
 ---------------------------------------------------
 This module implements the Grid class used to represent a colored numerical grid. 
 It supports pair evaluation, constraint checking, and visual rendering.
 
+The cells are stored in contiguous NumPy arrays (int8 colors, int64 values) so that the
+pairing constraints can be evaluated on whole rows and columns at once.
+
 Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mokline & Olivier de Boissieu
 """
 
+WHITE, RED, BLUE, GREEN, BLACK = range(5)
+
+# COLOR_COMPATIBILITY[c1, c2] is True if a cell of color c1 can be paired with a cell of color c2:
+# black cells never pair, white pairs with any other color, red and blue pair together, green only with green.
+COLOR_COMPATIBILITY = np.array([
+    [True, True, True, True, False],
+    [True, True, True, False, False],
+    [True, True, True, False, False],
+    [True, False, False, True, False],
+    [False, False, False, False, False],
+])
+
+# Binary grid format: a fixed 24-byte header (magic, n, m as little-endian int64), the color plane
+# (n * m int8, padded to a multiple of 8 bytes) then the value plane (n * m little-endian int64)
+BINARY_MAGIC = b"GRIDBIN1"
+BINARY_HEADER_SIZE = 24
+
+# Range of the values, stored as int64
+_INT64 = np.iinfo(np.int64)
 
+# Same table as nested tuples, faster than NumPy indexing for single cell lookups
+_COMPATIBLE = tuple(tuple(bool(c) for c in row) for row in COLOR_COMPATIBILITY)
+
+
+def _parse_int_lines(data, start, num_lines):
+    """
+    Parses the num_lines lines of integers that follow the offset start in the bytes data, with array operations.
+
+    Output: 
+    -------
+    tokens: np.ndarray
+        The integers of these lines, in order (int64)
+    counts: np.ndarray
+        The number of integers on each line (missing lines count as empty)
+    Returns None if a token is not a plain integer, in which case the caller should parse the lines one by one.
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(raw == 10)
+    following = newlines[newlines >= start]
+    if num_lines == 0:
+        end = start
+    elif num_lines <= len(following):
+        end = int(following[num_lines - 1])
+    else:
+        end = len(raw)
+    raw = raw[start:end]
+
+    digit = (raw >= 48) & (raw <= 57)
+    sign = (raw == 45) | (raw == 43)
+    space = (raw == 32) | (raw == 10) | (raw == 13) | (raw == 9)
+    if not np.all(digit | sign | space):
+        return None
+    # Token starts: first non-space character after a space (or at the beginning)
+    previous_space = np.concatenate(([True], space[:-1]))
+    token_start = ~space & previous_space
+    # A sign is only allowed as the first character of a token and must be followed by a digit
+    next_digit = np.concatenate((digit[1:], [False]))
+    if np.any(sign & ~(token_start & next_digit)):
+        return None
+    # Digit runs, each token holds exactly one
+    previous_digit = np.concatenate(([False], digit[:-1]))
+    run_start = np.flatnonzero(digit & ~previous_digit)
+    run_end = np.flatnonzero(digit & ~next_digit) + 1
+    starts = np.flatnonzero(token_start)
+    if len(run_start) != len(starts) or np.any(run_end - run_start > 18):
+        return None
+
+    # value of a token = sum of its digits times the powers of ten given by their distance to the end of the run
+    lengths = run_end - run_start
+    positions = np.flatnonzero(digit)
+    powers = np.repeat(run_end, lengths) - positions - 1
+    tokens = np.zeros(len(starts), dtype=np.int64)
+    if len(positions):
+        first_digit = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        tokens = np.add.reduceat((raw[positions] - 48).astype(np.int64) * 10 ** powers, first_digit)
+    tokens[raw[starts] == 45] *= -1
+
+    # Tokens per line, from the positions of the line breaks among the token starts
+    line_breaks = np.searchsorted(starts, np.flatnonzero(raw == 10))
+    counts = np.diff(np.concatenate(([0], line_breaks, [len(starts)])))
+    counts = np.concatenate((counts, np.zeros(max(0, num_lines - len(counts)), dtype=counts.dtype)))[:num_lines]
+    return tokens, counts
 
 
 class Grid:
@@ -31,8 +118,15 @@ class Grid:
         Note: lines are numbered 0..n-1 and columns are numbered 0..m-1.
     colors_list: list[char]
         The mapping between the value of self.color[i][j] and the corresponding color
+    color_array: np.ndarray
+        The colors as a contiguous (n, m) int8 array. This is the actual storage of the grid,
+        self.color is a list view built from it on first access.
+    value_array: np.ndarray
+        The values as a contiguous (n, m) int64 array, self.value is the corresponding list view.
     """
 
+    __slots__ = ("n", "m", "colors_list", "color_array", "value_array", "_color", "_value")
+
     def __init__(self, n, m, color=[], value=[]):
         """
         Initializes the grid.
@@ -43,10 +137,10 @@ class Grid:
             Number of lines in the grid
         m: int
             Number of columns in the grid
-        color: list[list[int]]
+        color: list[list[int]] or np.ndarray
             The grid cells colors. Default is empty (then the grid is created with each cell having color 0,
             i.e., white).
-        value: list[list[int]]
+        value: list[list[int]] or np.ndarray
             The grid cells values. Default is empty (then the grid is created with each cell having value 1).
         
         The object created has an attribute colors_list: list[char], which is the mapping between the value of
@@ -54,13 +148,58 @@ class Grid:
         """
         self.n = n
         self.m = m
-        if not color:
-            color = [[0 for j in range(m)] for i in range(n)]
+        self.colors_list = ['w', 'r', 'b', 'g', 'k']
+        if len(color) == 0:
+            color = np.zeros((n, m), dtype=np.int8)
         self.color = color
-        if not value:
-            value = [[1 for j in range(m)] for i in range(n)]
+        if len(value) == 0:
+            value = np.ones((n, m), dtype=np.int64)
         self.value = value
-        self.colors_list = ['w', 'r', 'b', 'g', 'k']
+
+    @property
+    def color(self):
+        """
+        The colors as a list of lists, built from color_array on first access.
+        The lists are a read-only view: assign self.color (or color_array) to change the grid.
+        """
+        if self._color is None:
+            self._color = self.color_array.tolist()
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        self.color_array = np.ascontiguousarray(color, dtype=np.int8).reshape(self.n, self.m)
+        self._color = None
+
+    @property
+    def value(self):
+        """
+        The values as a list of lists, built from value_array on first access.
+        The lists are a read-only view: assign self.value (or value_array) to change the grid.
+        """
+        if self._value is None:
+            self._value = self.value_array.tolist()
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self.value_array = np.ascontiguousarray(value, dtype=np.int64).reshape(self.n, self.m)
+        self._value = None
+
+    def set_cell(self, i, j, color=None, value=None):
+        """
+        Changes the color and/or the value of the cell (i, j), the arguments left to None are kept.
+        """
+        if color is not None:
+            if color not in range(5):
+                raise Exception("Invalid color")
+            self.color_array[i, j] = color
+            if self._color is not None:
+                self._color[i][j] = color
+        if value is not None:
+            self.value_array[i, j] = value
+            if self._value is not None:
+                self._value[i][j] = value
 
     def __str__(self):
         """
@@ -89,7 +228,7 @@ class Grid:
 
         fig, ax = plt.subplots()
 
-        ax.matshow(self.color, cmap=cmp, vmin=0, vmax=4)
+        ax.matshow(self.color_array, cmap=cmp, vmin=0, vmax=4)
 
         for i in range(self.m):
             for j in range(self.n):
@@ -101,7 +240,29 @@ class Grid:
         """
         Returns True is the cell (i, j) is black and False otherwise
         """
-        return self.colors_list[self.color[i][j]] == "k"
+        return self.color[i][j] == BLACK
+
+    def forbidden_mask(self):
+        """
+        Returns a boolean (n, m) array which is True on the black cells
+        """
+        return self.color_array == BLACK
+
+    def pair_masks(self):
+        """
+        Evaluates the color constraint on every pair of adjacent cells at once.
+
+        Output: 
+        -----------
+        horizontal: np.ndarray
+            (n, m-1) boolean array, horizontal[i, j] is True if ((i, j), (i, j+1)) is a valid pair
+        vertical: np.ndarray
+            (n-1, m) boolean array, vertical[i, j] is True if ((i, j), (i+1, j)) is a valid pair
+        """
+        c = self.color_array
+        horizontal = COLOR_COMPATIBILITY[c[:, :-1], c[:, 1:]]
+        vertical = COLOR_COMPATIBILITY[c[:-1, :], c[1:, :]]
+        return horizontal, vertical
 
     def cost(self, pair):
         """
@@ -126,67 +287,160 @@ class Grid:
         Takes two cells as input.
         Returns true if colors c1 and c2 are compatible
         """
-        c1 = self.color[cell1[0]][cell1[1]]
-        c2 = self.color[cell2[0]][cell2[1]]
-        return (c1 != 4 and c2 != 4) and (c1 * c2 == 0 or (c1 == 3 and c2 == 3) or (c1 in (1, 2) and c2 in (1, 2)))
+        color = self.color
+        return _COMPATIBLE[color[cell1[0]][cell1[1]]][color[cell2[0]][cell2[1]]]
 
-    def all_pairs(self):
+    def edges(self):
         """
-        Returns a list of all pairs of cells that can be taken together. 
+        Returns all pairs of cells that can be taken together as integer arrays.
 
-        Outputs a list of tuples of tuples [(c1, c2), (c1', c2'), ...] where each cell c1 etc. is itself a tuple (i, j)
+        The cell (i, j) is identified by its id i * m + j. The arrays are computed with array shifts
+        over whole rows and columns, the horizontal pairs come first then the vertical ones.
+
+        Output: 
+        -----------
+        src: np.ndarray
+            id of the first cell of each pair (the cell on the left or on top)
+        dst: np.ndarray
+            id of the second cell of each pair
+        cost: np.ndarray
+            cost of each pair, i.e. the absolute difference between the values of the two cells
         """
-        pairs = []
-        for i in range(self.n):
-            for j in range(self.m):
-                if self.is_forbidden(i, j) :
-                    continue  # Skip forbidden (black) cells
-
-                # Check right neighbor (horizontal adjacency)
-                if j + 1 < self.m and not self.is_forbidden(i, j + 1):
-                    # check if the neighbor satisfies the non black-coloured constraint
-                    if self.color_check((i, j), (i, j + 1)):
-                        pairs.append(((i, j), (i, j + 1)))
-
-                # Check bottom neighbor (vertical adjacency)
-                if i + 1 < self.n and not self.is_forbidden(i + 1, j):
-                    # check if the neighbor satisfies the non black-coloured constraint
-                    if self.color_check((i, j), (i + 1, j)):
-                        pairs.append(((i, j), (i + 1, j)))
+        horizontal, vertical = self.pair_masks()
+        ids = np.arange(self.n * self.m, dtype=np.intp).reshape(self.n, self.m)
+        src = np.concatenate((ids[:, :-1][horizontal], ids[:-1, :][vertical]))
+        dst = np.concatenate((ids[:, 1:][horizontal], ids[1:, :][vertical]))
+        value = self.value_array.ravel()
+        cost = np.abs(value[src] - value[dst])
+        return src, dst, cost
+
+    def bipartite_edges(self):
+        """
+        Returns the pairs of self.edges() oriented from their even cell to their odd cell
+        (every valid pair joins an even cell, i.e. i + j even, to an odd cell).
 
-        return pairs
+        Output: 
+        -----------
+        even, odd, cost: np.ndarray
+            id of the even cell, id of the odd cell and cost of each pair
+        """
+        src, dst, cost = self.edges()
+        i, j = np.divmod(src, self.m)
+        src_is_even = (i + j) % 2 == 0
+        return np.where(src_is_even, src, dst), np.where(src_is_even, dst, src), cost
 
-    def all_pairs2(self):
+    def components(self):
         """
-        Returns a list of all pairs of cells that can be taken together, including non-adjacent white pairs.
+        Labels the connected components of the graph whose edges are the valid pairs.
+
+        The labels are computed with array operations: each component is repeatedly hooked onto the smallest
+        label among its neighbours, then the labels are shortcut until each cell points to the root of its tree.
+
+        Output: 
+        -----------
+        label: np.ndarray
+            array of size n * m, label[k] is the smallest cell id of the component of the cell k
+            (a cell without valid pair is alone in its component)
+        """
+        src, dst, _ = self.edges()
+        label = np.arange(self.n * self.m, dtype=np.intp)
+        while True:
+            low, high = label[src], label[dst]
+            low, high = np.minimum(low, high), np.maximum(low, high)
+            differ = low != high
+            if not np.any(differ):
+                return label
+            np.minimum.at(label, high[differ], low[differ])
+            while True:
+                shortcut = label[label]
+                if np.array_equal(shortcut, label):
+                    break
+                label = shortcut
+
+    def adjacency(self):
         """
-        pairs = []
-        white_cells = [(i, j) for i in range(self.n) for j in range(self.m)
-                       if self.color[i][j] == 0 and not self.is_forbidden(i, j)]
+        Returns the pairs of self.edges() as a symmetric adjacency in CSR format.
 
-        # Add all pairs of white cells (including non-adjacent ones)
-        for idx1 in range(len(white_cells)):
-            for idx2 in range(idx1 + 1, len(white_cells)):
-                cell1 = white_cells[idx1]
-                cell2 = white_cells[idx2]
-                pairs.append((cell1, cell2))
+        Output: 
+        -----------
+        indptr: np.ndarray
+            array of size n * m + 1, the neighbours of the cell k are indices[indptr[k]:indptr[k + 1]]
+        indices: np.ndarray
+            ids of the neighbours, sorted by cell
+        cost: np.ndarray
+            cost of the pair formed by the cell and each neighbour
+        """
+        src, dst, cost = self.edges()
+        heads = np.concatenate((src, dst))
+        order = np.argsort(heads, kind="stable")
+        indptr = np.zeros(self.n * self.m + 1, dtype=np.intp)
+        np.cumsum(np.bincount(heads, minlength=self.n * self.m), out=indptr[1:])
+        indices = np.concatenate((dst, src))[order]
+        return indptr, indices, np.concatenate((cost, cost))[order]
+
+    def pairs_from_ids(self, src, dst):
+        """
+        Converts two arrays of cell ids into a list of pairs in the format ((i1, j1), (i2, j2))
+        """
+        i1, j1 = np.divmod(np.asarray(src), self.m)
+        i2, j2 = np.divmod(np.asarray(dst), self.m)
+        return list(zip(zip(i1.tolist(), j1.tolist()), zip(i2.tolist(), j2.tolist())))
 
-        # Add adjacent pairs (original logic)
-        for i in range(self.n):
-            for j in range(self.m):
-                if self.is_forbidden(i, j):
-                    continue  # Skip forbidden (black) cells
+    def all_pairs(self):
+        """
+        Returns a list of all pairs of cells that can be taken together. 
 
-                # Check right neighbor (horizontal adjacency)
-                if j + 1 < self.m and not self.is_forbidden(i, j + 1):
-                    if self.valid_pair2((i, j), (i, j + 1)):
-                        pairs.append(((i, j), (i, j + 1)))
+        Outputs a list of tuples of tuples [(c1, c2), (c1', c2'), ...] where each cell c1 etc. is itself a tuple (i, j)
+        """
+        src, dst, _ = self.edges()
+        return self.pairs_from_ids(src, dst)
+
+    def white_cells(self):
+        """
+        Implicit representation of the white pairs of the variant.
+
+        In the variant, two white cells can be taken together even if they are not adjacent, as long as
+        one is even and the other is odd (the checkerboard split used by the bipartite model). Instead of
+        listing the O(W²) white pairs, this returns the two sides of this complete bipartite graph.
+
+        Output: 
+        -----------
+        even: np.ndarray
+            ids of the even white cells, sorted by increasing value
+        odd: np.ndarray
+            ids of the odd white cells, sorted by increasing value
+        """
+        ids = np.flatnonzero(self.color_array.ravel() == WHITE)
+        i, j = np.divmod(ids, self.m)
+        value = self.value_array.ravel()
+        even, odd = ids[(i + j) % 2 == 0], ids[(i + j) % 2 == 1]
+        even = even[np.argsort(value[even], kind="stable")]
+        odd = odd[np.argsort(value[odd], kind="stable")]
+        return even, odd
+
+    def edges2(self):
+        """
+        Returns the adjacent pairs of the variant that are not covered by self.white_cells(),
+        i.e. the pairs of self.edges() where at least one of the two cells is not white.
+        Same output format as self.edges().
+        """
+        src, dst, cost = self.edges()
+        color = self.color_array.ravel()
+        keep = (color[src] != WHITE) | (color[dst] != WHITE)
+        return src[keep], dst[keep], cost[keep]
 
-                # Check bottom neighbor (vertical adjacency)
-                if i + 1 < self.n and not self.is_forbidden(i + 1, j):
-                    if self.valid_pair2((i, j), (i + 1, j)):
-                        pairs.append(((i, j), (i + 1, j)))
+    def all_pairs2(self):
+        """
+        Returns a list of all pairs of cells that can be taken together, including non-adjacent white pairs.
 
+        Warning: the list holds every even/odd pair of white cells, which is quadratic in the number of
+        white cells. Solvers should use self.white_cells() and self.edges2() instead.
+        """
+        even, odd = self.white_cells()
+        a, b = np.repeat(even, len(odd)), np.tile(odd, len(even))
+        pairs = self.pairs_from_ids(np.minimum(a, b), np.maximum(a, b))
+        src, dst, _ = self.edges2()
+        pairs += self.pairs_from_ids(src, dst)
         return pairs
 
     def valid_pair(self, cell1, cell2):
@@ -202,22 +456,74 @@ class Grid:
         (i1, j1), (i2, j2) = cell1, cell2
         c1, c2 = self.color[i1][j1], self.color[i2][j2]
 
-        # If both cells are white, they can be paired regardless of adjacency
-        if c1 == 0 and c2 == 0:
-            return True
+        # If both cells are white, they can be paired regardless of adjacency (one even, one odd)
+        if c1 == WHITE and c2 == WHITE:
+            return (i1 + j1 + i2 + j2) % 2 == 1
 
         # Otherwise, they must be adjacent and satisfy the original color constraints
         if abs(i1 - i2) + abs(j1 - j2) != 1:  # Check adjacency
             return False
+        return _COMPATIBLE[c1][c2]
 
-        # Original color constraints
-        if c1 == 0 or c2 == 0:  # White can be paired with anything except black
-            return True
-        if c1 == c2:  # Same colors can always pair
-            return True
-        if (c1, c2) in [(1, 2), (2, 1)]:  # Red & Blue
-            return True
-        return False
+    def pair_ids(self, pairs):
+        """
+        Converts a list of pairs in the format ((i1, j1), (i2, j2)) into two arrays of cell ids.
+        Raises an exception if a cell is outside the grid.
+        """
+        coords = np.asarray(pairs, dtype=np.int64).reshape(-1, 4)
+        rows, columns = coords[:, 0::2], coords[:, 1::2]
+        if np.any((rows < 0) | (rows >= self.n) | (columns < 0) | (columns >= self.m)):
+            raise Exception("Invalid pair")
+        return rows[:, 0] * self.m + columns[:, 0], rows[:, 1] * self.m + columns[:, 1]
+
+    def check_pairs(self, src, dst, variant=False):
+        """
+        Checks a whole set of pairs given as arrays of cell ids, raises an exception if a pair is not valid
+        (valid_pair, or valid_pair2 if variant is True) or if a cell is used by two pairs.
+        """
+        src, dst = np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+        i1, j1 = np.divmod(src, self.m)
+        i2, j2 = np.divmod(dst, self.m)
+        color = self.color_array.ravel()
+        c1, c2 = color[src], color[dst]
+        valid = (np.abs(i1 - i2) + np.abs(j1 - j2) == 1) & COLOR_COMPATIBILITY[c1, c2]
+        if variant:
+            valid |= (c1 == WHITE) & (c2 == WHITE) & ((i1 + j1 + i2 + j2) % 2 == 1)
+        if not np.all(valid):
+            raise Exception("Invalid pair")
+        if np.any(np.bincount(np.concatenate((src, dst)), minlength=self.n * self.m) > 1):
+            raise Exception("Cell used twice")
+
+    def score_ids(self, src, dst, variant=False):
+        """
+        Returns the score of a set of pairs given as arrays of cell ids, see self.score.
+        """
+        src, dst = np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+        self.check_pairs(src, dst, variant)
+        value = self.value_array.ravel()
+        unpaired = self.color_array.ravel() != BLACK
+        unpaired[src] = False
+        unpaired[dst] = False
+        return int(np.abs(value[src] - value[dst]).sum() + value[unpaired].sum())
+
+    def score(self, pairs, variant=False):
+        """
+        Returns the score of a set of pairs, evaluated on all the pairs at once.
+
+        Parameters: 
+        -----------
+        pairs: list[tuple[tuple[int]]]
+            The pairs in the format ((i1, j1), (i2, j2))
+        variant: bool
+            If True, the pairs follow the rules of the variant (valid_pair2) instead of valid_pair
+
+        Output: 
+        -----------
+        score: int
+            the sum of the costs of the pairs plus the values of the non-black cells that are not paired.
+            Raises an exception if a pair is not valid or if a cell is used twice.
+        """
+        return self.score_ids(*self.pair_ids(pairs), variant=variant)
 
     def even(self):
         """Return all even cells"""
@@ -228,7 +534,7 @@ class Grid:
         return [(i, j) for i in range(self.n) for j in range(self.m) if (i + j) % 2 == 1]
 
     @classmethod
-    def grid_from_file(cls, file_name, read_values=True):
+    def grid_from_file(cls, file_name, read_values=True, profiler=NULL_PROFILER):
         """
         Creates a grid object from class Grid, initialized with the information from the file file_name.
         
@@ -239,14 +545,110 @@ class Grid:
             - first line contains "n m" 
             - next n lines contain m integers that represent the colors of the corresponding cell
             - next n lines [optional] contain m integers that represent the values of the corresponding cell
+            The values are stored as int64: a value outside [-2**63, 2**63 - 1] is rejected as "Format incorrect".
         read_values: bool
             Indicates whether to read values after having read the colors. Requires that the file has 2n+1 lines
+        profiler: profiling.Profiler
+            If given, records the phases "read" and "parse"
+
+        Output: 
+        -------
+        grid: Grid
+            The grid
+        """
+        with profiler.phase("read") as phase:
+            with open(file_name, "rb") as file:
+                data = file.read()
+            phase["bytes"] = len(data)
+
+        # Fast path: the whole file is tokenized at once. Anything unusual (malformed line, invalid color,
+        # non-integer token...) is handed to the line by line reader, which raises the corresponding error.
+        with profiler.phase("parse") as phase:
+            header_end = data.find(b"\n")
+            header = (data if header_end < 0 else data[:header_end]).split()
+            if len(header) == 2 and header[0].isdigit() and header[1].isdigit() and header_end >= 0:
+                n, m = int(header[0]), int(header[1])
+                num_lines = 2 * n if read_values else n
+                parsed = _parse_int_lines(data, header_end + 1, num_lines)
+                if parsed is not None:
+                    tokens, counts = parsed
+                    if m > 0 and np.all(counts == m):
+                        color = tokens[:n * m].reshape(n, m)
+                        if np.all((color >= 0) & (color < 5)):
+                            value = tokens[n * m:].reshape(n, m) if read_values else []
+                            phase["cells"] = n * m
+                            return Grid(n, m, color, value)
+            phase["fallback"] = True
+            return cls._grid_from_file_by_line(file_name, read_values)
+
+    def to_file(self, file_name, write_values=True, chunk_rows=1024):
+        """
+        Writes the grid to file_name in the format read by grid_from_file (the values are written if write_values),
+        chunk_rows rows at a time.
+        """
+        with open(file_name, "w") as file:
+            file.write(f"{self.n} {self.m}\n")
+            planes = (self.color_array, self.value_array) if write_values else (self.color_array,)
+            for plane in planes:
+                for start in range(0, self.n, chunk_rows):
+                    rows = plane[start:start + chunk_rows].tolist()
+                    file.write("".join(" ".join(map(str, row)) + "\n" for row in rows))
+
+    def to_binary_file(self, file_name):
+        """
+        Writes the grid to file_name in the binary grid format (see BINARY_MAGIC), which
+        grid_from_binary_file loads without parsing nor copying.
+        """
+        size = self.n * self.m
+        padding = -size % 8
+        with open(file_name, "wb") as file:
+            file.write(BINARY_MAGIC)
+            file.write(np.array([self.n, self.m], dtype="<i8").tobytes())
+            file.write(self.color_array.astype(np.int8).tobytes())
+            file.write(bytes(padding))
+            file.write(self.value_array.astype("<i8").tobytes())
+
+    @classmethod
+    def grid_from_binary_file(cls, file_name):
+        """
+        Creates a grid from a file in the binary grid format. The color and value planes are memory-mapped
+        in copy-on-write mode: the grid arrays read the file directly and changes to them are never written back.
+
+        Parameters: 
+        -----------
+        file_name: str
+            Name of the file to load, written by Grid.to_binary_file or convert_to_binary_file
 
         Output: 
         -------
         grid: Grid
             The grid
         """
+        with open(file_name, "rb") as file:
+            header = file.read(BINARY_HEADER_SIZE)
+            file.seek(0, 2)
+            file_size = file.tell()
+        if len(header) != BINARY_HEADER_SIZE or header[:8] != BINARY_MAGIC:
+            raise Exception("Format incorrect")
+        n, m = np.frombuffer(header, dtype="<i8", offset=8).tolist()
+        size = n * m
+        values_offset = BINARY_HEADER_SIZE + size + (-size % 8)
+        if n < 0 or m < 0 or file_size != values_offset + 8 * size:
+            raise Exception("Format incorrect")
+        if size == 0:
+            return Grid(n, m)
+        color = np.memmap(file_name, dtype=np.int8, mode="c", offset=BINARY_HEADER_SIZE, shape=(n, m))
+        if np.any((color < 0) | (color > 4)):
+            raise Exception("Invalid color")
+        value = np.memmap(file_name, dtype="<i8", mode="c", offset=values_offset, shape=(n, m))
+        return Grid(n, m, color, value)
+
+    @classmethod
+    def _grid_from_file_by_line(cls, file_name, read_values=True):
+        """
+        Reads the file line by line, checking each line in order. Same parameters and output as grid_from_file,
+        which relies on it to report malformed files.
+        """
         with open(file_name, "r") as file:
             n, m = map(int, file.readline().split())
             color = [[] for i_line in range(n)]
@@ -265,9 +667,69 @@ class Grid:
                     line_value = list(map(int, file.readline().split()))
                     if len(line_value) != m:
                         raise Exception("Format incorrect")
+                    if any(v < _INT64.min or v > _INT64.max for v in line_value):
+                        raise Exception("Format incorrect")
                     value[i_line] = line_value
             else:
                 value = []
 
             grid = Grid(n, m, color, value)
         return grid
+
+
+class ScoreTracker:
+    """
+    Keeps the score of a set of pairs up to date while pairs are added or removed one at a time,
+    in O(1) per move (e.g. for the interactive game).
+
+    Attributes: 
+    -----------
+    grid: Grid
+        The grid
+    score: int
+        The score of the current pairs, as given by grid.score
+    pairs: set[tuple[tuple[int]]]
+        The current pairs
+    """
+
+    def __init__(self, grid, variant=False):
+        """
+        Starts with no pair: the score is the sum of the values of the non-black cells.
+        """
+        self.grid = grid
+        self.variant = variant
+        self.score = int(grid.value_array[grid.color_array != BLACK].sum())
+        self.pairs = set()
+        self._used = set()
+
+    def add(self, pair):
+        """
+        Adds a pair ((i1, j1), (i2, j2)), raises an exception if it is not valid or if a cell is already used.
+        """
+        c1, c2 = pair
+        valid = self.grid.valid_pair2(c1, c2) if self.variant else self.grid.valid_pair(c1, c2)
+        if not valid:
+            raise Exception("Invalid pair")
+        if c1 in self._used or c2 in self._used:
+            raise Exception("Cell used twice")
+        self._used.update((c1, c2))
+        self.pairs.add(pair)
+        v1, v2 = self.grid.value[c1[0]][c1[1]], self.grid.value[c2[0]][c2[1]]
+        self.score += abs(v1 - v2) - v1 - v2
+
+    def remove(self, pair):
+        """
+        Removes a pair previously added.
+        """
+        self.pairs.remove(pair)
+        c1, c2 = pair
+        self._used.difference_update((c1, c2))
+        v1, v2 = self.grid.value[c1[0]][c1[1]], self.grid.value[c2[0]][c2[1]]
+        self.score -= abs(v1 - v2) - v1 - v2
+
+
+def convert_to_binary_file(file_name, binary_file_name, read_values=True):
+    """
+    Converts a grid file in the text format of Grid.grid_from_file to the binary grid format.
+    """
+    Grid.grid_from_file(file_name, read_values=read_values).to_binary_file(binary_file_name)
@@ -22,9 +22,9 @@ grid.plot()
 
 # Run the Greedy solver
 greedy_solver = SolverGreedy(grid)
-greedy_solution = greedy_solver.run()
+greedy_solution, greedy_score = greedy_solver.run()
 print("Greedy solution:", greedy_solution)
-print("Greedy solver score:", greedy_solver.score())
+print("Greedy solver score:", greedy_score)
 
 # Run the Optimal Hungarian solver
 optimal_solver = SolverMaxWeightMatching(grid)
@@ -0,0 +1,507 @@
+"""
+matching.py — Sparse Bipartite Minimum Cost Matching
+----------------------------------------------------
+This module implements the matching engine used by the optimal solvers. Every valid pair of the grid joins an
+even cell to an odd cell, so the pairing problem is a minimum cost matching in a sparse bipartite graph.
+
+The engine works on integer cell ids with a CSR adjacency and uses successive shortest paths: each phase runs
+one Dijkstra (on costs made non-negative by node potentials) from all the free left nodes, then augments the
+matching along a maximal set of disjoint shortest paths, as Hopcroft-Karp does for the cardinality case.
+The matching only grows while the shortest augmenting path has a negative cost, so the result is the minimum
+cost matching over all cardinalities.
+
+In perfect mode the engine computes a minimum cost perfect matching instead, which can then be updated: when the
+costs of a few edges change, only the ends of the edges that break the optimality of the matching are unmatched,
+and the matching is repaired by phases from them. The phases of a repair are limited to UPDATE_LIMIT settled
+nodes each; beyond that, the matching is solved again from scratch.
+
+Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mokline & Olivier de Boissieu
+"""
+
+import heapq
+
+import numpy as np
+
+# Maximal number of nodes settled by a phase of MinCostMatching.update before it gives up the local repair
+UPDATE_LIMIT = 10000
+
+
+class _LimitExceeded(Exception):
+    """
+    Raised in a phase when the Dijkstra settles more nodes than its limit.
+    """
+
+
+class MinCostMatching:
+    """
+    Minimum cost matching in a bipartite graph.
+
+    Attributes:
+    -----------
+    num_nodes: int
+        Number of nodes, numbered 0..num_nodes-1 (for a grid, the cell ids)
+    mate: list[int]
+        mate[u] is the node matched with u, or -1 if u is free
+    potential: list[int]
+        Node potentials, the reduced cost cost(u, v) + potential[u] - potential[v] of every arc of the
+        residual graph is non-negative
+    phases: int
+        Number of Dijkstra phases run so far
+    perfect: bool
+        True if the engine looks for a minimum cost perfect matching
+    """
+
+    def __init__(self, num_nodes, left, right, cost, perfect=False):
+        """
+        Initializes the engine with the edges left[k] - right[k] of cost cost[k].
+
+        Parameters:
+        -----------
+        num_nodes: int
+            Number of nodes
+        left: np.ndarray
+            Left end of each edge (e.g. the even cell)
+        right: np.ndarray
+            Right end of each edge (e.g. the odd cell)
+        cost: np.ndarray
+            Cost of each edge. Leaving both ends unmatched costs 0, so only edges of negative cost can be useful.
+        perfect: bool
+            If True, the phases augment along the shortest paths whatever their cost, until no augmenting path
+            is left: the result is then a minimum cost perfect matching when the graph has one. Only such an
+            engine can be updated (see update).
+        """
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        cost = np.asarray(cost, dtype=np.int64)
+        self.num_nodes = num_nodes
+        self.perfect = perfect
+
+        # Arcs from the left nodes, grouped by left node
+        order = np.argsort(left, kind="stable")
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(left, minlength=num_nodes), out=indptr[1:])
+        self._indptr = indptr.tolist()
+        self._head = right[order].tolist()
+        self._cost = cost[order].tolist()
+
+        is_left = np.zeros(num_nodes, dtype=bool)
+        is_left[left] = True
+        is_right = np.zeros(num_nodes, dtype=bool)
+        is_right[right] = True
+        self._left_nodes = np.flatnonzero(is_left).tolist()
+        self._right_nodes = np.flatnonzero(is_right).tolist()
+        self._is_right = is_right.tolist()
+
+        self.phases = 0
+        self._tail = None
+        self._reset()
+
+    def _reset(self):
+        """
+        Empties the matching and sets the initial potentials: 0 on the left, the cheapest incoming arc on the right.
+        """
+        self.mate = [-1] * self.num_nodes
+        self._mate_cost = [0] * self.num_nodes
+        lowest = np.zeros(self.num_nodes, dtype=np.int64)
+        np.minimum.at(lowest, np.asarray(self._head, dtype=np.int64), np.asarray(self._cost, dtype=np.int64))
+        self.potential = lowest.tolist()
+
+    def _build_reverse(self):
+        """
+        Builds the arcs grouped by right node (the tail of each arc and, for each right node, the indices of its
+        incoming arcs), which are only needed to update the engine.
+        """
+        indptr = np.asarray(self._indptr, dtype=np.int64)
+        head = np.asarray(self._head, dtype=np.int64)
+        tail = np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(indptr))
+        reverse_indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(head, minlength=self.num_nodes), out=reverse_indptr[1:])
+        self._tail = tail.tolist()
+        self._reverse_indptr = reverse_indptr.tolist()
+        self._reverse_arc = np.argsort(head, kind="stable").tolist()
+
+    def free_left(self):
+        """
+        Returns the left nodes that are not matched.
+        """
+        mate = self.mate
+        return [u for u in self._left_nodes if mate[u] < 0]
+
+    def free_right(self):
+        """
+        Returns the right nodes that are not matched.
+        """
+        mate = self.mate
+        return [v for v in self._right_nodes if mate[v] < 0]
+
+    def cost(self):
+        """
+        Returns the total cost of the current matching.
+        """
+        mate, mate_cost = self.mate, self._mate_cost
+        return sum(mate_cost[u] for u in self._left_nodes if mate[u] >= 0)
+
+    def pairs(self):
+        """
+        Returns the matched edges as two arrays (left nodes, right nodes).
+        """
+        mate = self.mate
+        left = [u for u in self._left_nodes if mate[u] >= 0]
+        return np.array(left, dtype=np.int64), np.array([mate[u] for u in left], dtype=np.int64)
+
+    def _dijkstra(self, sources, top, sink, local=False, limit=None):
+        """
+        Shortest paths on the reduced costs from the free left nodes in sources.
+
+        The source x starts at key top - potential[x] and the free right node v ends at the sink with the extra
+        cost potential[v] - sink, with top >= potential[x] and sink <= potential[v]: the order of the distances is
+        then the order of the real costs, the real cost of a path being its distance + sink - top. As only paths
+        of negative real cost are useful, the search stops at distance top - sink (in perfect mode every path is
+        useful and the search only stops at the cheapest one). Raises _LimitExceeded if more than limit nodes are
+        settled.
+
+        Output:
+        -------
+        dist: dict
+            Distance of each settled node
+        target: int
+            Distance of the cheapest path to a free right node, None if there is no (useful) path
+        """
+        indptr, head, cost, mate, mate_cost, potential, is_right = (
+            self._indptr, self._head, self._cost, self.mate, self._mate_cost, self.potential, self._is_right)
+        bound = float("inf") if self.perfect else top - sink
+        dist = {}
+        best = {}
+        # Entries (key, order, node). A free right node is queued at the cost of the path that it ends with order
+        # -1, so that it is popped before the nodes of the same key, which do not need to be settled. Among the
+        # other nodes of the same key, the order is the node id, or if local the order in which they were queued:
+        # the search then spreads evenly from the few sources over the regions of reduced cost 0 instead of
+        # sweeping them in the order of the node ids, and reaches the free right nodes close to the sources first
+        heap = []
+        for x in sources:
+            best[x] = top - potential[x]
+            heap.append((top - potential[x], len(heap) if local else x, x))
+        heapq.heapify(heap)
+        pushed = len(heap)
+        ends = []
+        target = None
+        while heap:
+            d, order, u = heapq.heappop(heap)
+            if d >= bound or (target is not None and d >= target):
+                break
+            if order < 0:
+                # Free right node: end of the cheapest augmenting path
+                target = d
+                continue
+            if u in dist:
+                continue
+            dist[u] = d
+            if limit is not None and len(dist) > limit:
+                raise _LimitExceeded()
+            pu = potential[u]
+            w = mate[u]
+            if is_right[u]:
+                # Matched right node: the only arc goes back to its mate
+                if w not in dist:
+                    nd = d - mate_cost[u] + pu - potential[w]
+                    if w not in best or nd < best[w]:
+                        best[w] = nd
+                        heapq.heappush(heap, (nd, pushed if local else w, w))
+                        pushed += 1
+                continue
+            for a in range(indptr[u], indptr[u + 1]):
+                v = head[a]
+                if v == w or v in dist:
+                    continue
+                nd = d + cost[a] + pu - potential[v]
+                if v not in best or nd < best[v]:
+                    if mate[v] < 0:
+                        if v not in best:
+                            ends.append(v)
+                        heapq.heappush(heap, (nd + potential[v] - sink, -1, v))
+                    else:
+                        heapq.heappush(heap, (nd, pushed if local else v, v))
+                        pushed += 1
+                    best[v] = nd
+        # The free right nodes closer than the target are settled too (their distance is final: it can only
+        # come from nodes closer than them)
+        if target is not None:
+            for v in ends:
+                if best[v] < target:
+                    dist[v] = best[v]
+        return dist, target
+
+    def _augment(self, sources, source_potential, sink, settled=None):
+        """
+        Augments the matching along disjoint paths of reduced cost 0, from the sources whose potential is
+        source_potential to the free right nodes whose potential is sink (depth-first search where each
+        node is visited at most once). If settled is given, the paths only go through these nodes before
+        reaching a free right node. Returns the number of augmenting paths.
+        """
+        indptr, head, cost, mate, mate_cost, potential = (self._indptr, self._head, self._cost, self.mate,
+                                                          self._mate_cost, self.potential)
+        visited = set()
+        augmented = 0
+        for x in sources:
+            if mate[x] >= 0 or potential[x] != source_potential:
+                continue
+            visited.add(x)
+            stack, via, position = [x], [], [indptr[x]]
+            while stack:
+                u = stack[-1]
+                a, end, pu, w = position[-1], indptr[u + 1], potential[u], mate[u]
+                while a < end:
+                    v = head[a]
+                    if (v != w and v not in visited and cost[a] + pu - potential[v] == 0
+                            and (settled is None or v in settled or mate[v] < 0)):
+                        break
+                    a += 1
+                position[-1] = a + 1
+                if a >= end:
+                    stack.pop()
+                    position.pop()
+                    if via:
+                        via.pop()
+                    continue
+                v = head[a]
+                visited.add(v)
+                if mate[v] < 0:
+                    if potential[v] != sink:
+                        continue
+                    # Flip the path: stack[k] is matched with the right node chosen from it
+                    via.append(v)
+                    for k, u in enumerate(stack):
+                        v = via[k]
+                        for b in range(indptr[u], indptr[u + 1]):
+                            if head[b] == v:
+                                mate_cost[u] = mate_cost[v] = cost[b]
+                                break
+                        mate[u], mate[v] = v, u
+                    augmented += 1
+                    break
+                w = mate[v]
+                if w not in visited and (settled is None or w in settled):
+                    visited.add(w)
+                    stack.append(w)
+                    via.append(v)
+                    position.append(indptr[w])
+        return augmented
+
+    def phase(self, sources=None, sinks=None, local=False, limit=None):
+        """
+        Runs one phase: a Dijkstra from the free left nodes in sources (all of them by default) to the free right
+        nodes in sinks (all of them by default), then the augmentations along the shortest paths found if they
+        have a negative cost (or whatever their cost in perfect mode).
+
+        If local is True, the augmenting paths are only searched among the nodes settled by the Dijkstra. There
+        are then fewer paths per phase, but the phase does not explore the arcs of reduced cost 0 beyond the
+        shortest paths, which keeps it local when only a few nodes are free (see update). If limit is given, the
+        phase raises _LimitExceeded, without changing the matching, when its Dijkstra settles more nodes.
+
+        Output:
+        -------
+        path_cost: int
+            Real cost of the shortest augmenting path, None if no augmenting path was found
+        augmented: int
+            Number of augmenting paths used, which all have the cost path_cost
+        """
+        if sources is None:
+            sources = self.free_left()
+        if sinks is None:
+            sinks = self.free_right()
+        if not sources or not sinks:
+            return None, 0
+        potential = self.potential
+        top = max(potential[x] for x in sources)
+        sink = min(potential[v] for v in sinks)
+        dist, target = self._dijkstra(sources, top, sink, local, limit)
+        if target is None:
+            return None, 0
+        self.phases += 1
+        # Potential update: +min(dist, target) on every node, shifted by -target so that only the nodes
+        # settled closer than target change (a uniform shift leaves every reduced cost unchanged)
+        for u, d in dist.items():
+            if d < target:
+                potential[u] += d - target
+        return target + sink - top, self._augment(sources, top - target, sink, dist if local else None)
+
+    def solve(self):
+        """
+        Runs phases until no augmenting path has a negative cost. Returns the cost of the matching, which is
+        then the minimum over all matchings.
+        """
+        while self.phase()[0] is not None:
+            pass
+        return self.cost()
+
+    def update(self, left, right, cost, limit=UPDATE_LIMIT):
+        """
+        Changes the cost of the existing edges left[k] - right[k] to cost[k] and repairs the matching, which is
+        then again a minimum cost perfect matching (the engine must be in perfect mode and solved).
+
+        The matching stays optimal as long as the matched edges have a reduced cost of 0 and the others a
+        non-negative one. So only the left end of a changed edge that is matched, or whose reduced cost becomes
+        negative, is unmatched, with its mate. The potential of each freed left node is lowered to the smallest
+        value that keeps the reduced costs of its arcs non-negative: the other nodes keep valid potentials, so
+        the matching is repaired by local phases (see phase) from the freed nodes only. These phases explore the
+        graph around the changed edges, usually a few dozen nodes whatever the size of the graph. If a phase
+        settles more than limit nodes (None for no limit), the repair is given up and the matching is solved
+        again from scratch.
+
+        Output:
+        -------
+        delta: int
+            Change of the cost of the matching
+        """
+        if not self.perfect:
+            raise Exception("Only a perfect matching engine can be updated")
+        indptr, head, arc_cost, mate, mate_cost, potential, is_right = (
+            self._indptr, self._head, self._cost, self.mate, self._mate_cost, self.potential, self._is_right)
+        delta = 0
+        freed = set()
+        for u, v, c in zip(left, right, cost):
+            for a in range(indptr[u], indptr[u + 1]):
+                if head[a] == v:
+                    arc_cost[a] = c
+                    break
+            else:
+                raise Exception("Unknown edge")
+            if mate[u] == v:
+                ends = (u,)
+            elif c + potential[u] - potential[v] < 0:
+                ends = (u,)
+            else:
+                continue
+            for x in ends:
+                w = mate[x]
+                if w >= 0:
+                    delta -= mate_cost[x]
+                    mate[x] = mate[w] = -1
+                    freed.add(w)
+                freed.add(x)
+
+        sources = [u for u in freed if not is_right[u]]
+        sinks = [v for v in freed if is_right[v]]
+        for u in sources:
+            if indptr[u] < indptr[u + 1]:
+                potential[u] = max(potential[head[a]] - arc_cost[a] for a in range(indptr[u], indptr[u + 1]))
+        # The freed right nodes are raised as much as their incoming arcs allow, which makes the shortest paths
+        # to them as short as possible and keeps the phases local
+        if self._tail is None:
+            self._build_reverse()
+        tail, reverse_indptr, reverse_arc = self._tail, self._reverse_indptr, self._reverse_arc
+        for v in sinks:
+            if reverse_indptr[v] < reverse_indptr[v + 1]:
+                potential[v] = min(arc_cost[a] + potential[tail[a]]
+                                   for a in reverse_arc[reverse_indptr[v]:reverse_indptr[v + 1]])
+
+        while sources and sinks:
+            try:
+                path_cost, augmented = self.phase(sources, sinks, local=True, limit=limit)
+            except _LimitExceeded:
+                before = self.cost() - delta
+                self._reset()
+                return self.solve() - before
+            if path_cost is None:
+                break
+            delta += path_cost * augmented
+            sources = [u for u in sources if mate[u] < 0]
+            sinks = [v for v in sinks if mate[v] < 0]
+        return delta
+
+
+def max_cardinality_matching(num_nodes, left, right):
+    """
+    Maximum cardinality matching in a bipartite graph with the Hopcroft-Karp algorithm, in O(E sqrt(V)).
+
+    Each phase builds the layers of the shortest alternating paths with a breadth-first search from the free
+    left nodes, then augments along disjoint shortest paths with an iterative depth-first search, so that large
+    graphs do not hit the recursion limit.
+
+    Parameters:
+    -----------
+    num_nodes: int
+        Number of nodes, numbered 0..num_nodes-1
+    left: np.ndarray
+        Left end of each edge
+    right: np.ndarray
+        Right end of each edge
+
+    Output:
+    -------
+    mate: list[int]
+        mate[u] is the node matched with u, or -1 if u is free
+    """
+    left = np.asarray(left, dtype=np.int64)
+    right = np.asarray(right, dtype=np.int64)
+    order = np.argsort(left, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(left, minlength=num_nodes), out=indptr[1:])
+    indptr = indptr.tolist()
+    head = right[order].tolist()
+    left_nodes = np.unique(left).tolist()
+
+    mate = [-1] * num_nodes
+    # Greedy initial matching, most augmenting paths are then already taken care of
+    for u in left_nodes:
+        for a in range(indptr[u], indptr[u + 1]):
+            v = head[a]
+            if mate[v] < 0:
+                mate[u], mate[v] = v, u
+                break
+
+    unreached = num_nodes + 1
+    layer = [unreached] * num_nodes
+    while True:
+        # Breadth-first search: layer[u] is the length (in left nodes) of the shortest alternating path to u
+        free = [u for u in left_nodes if mate[u] < 0]
+        for u in left_nodes:
+            layer[u] = unreached
+        for u in free:
+            layer[u] = 0
+        limit = unreached
+        queue = list(free)
+        for u in queue:
+            du = layer[u]
+            if du >= limit:
+                break
+            for a in range(indptr[u], indptr[u + 1]):
+                w = mate[head[a]]
+                if w < 0:
+                    limit = du + 1
+                elif layer[w] == unreached:
+                    layer[w] = du + 1
+                    queue.append(w)
+        if limit == unreached:
+            return mate
+
+        # Depth-first search along the layers, a dead end node is removed from the layers
+        position = indptr[:-1]
+        for x in free:
+            stack, via = [x], []
+            while stack:
+                u = stack[-1]
+                a, end, du = position[u], indptr[u + 1], layer[u]
+                while a < end:
+                    v = head[a]
+                    w = mate[v]
+                    if (w < 0 and du + 1 == limit) or (w >= 0 and layer[w] == du + 1):
+                        break
+                    a += 1
+                position[u] = a + 1
+                if a >= end:
+                    layer[u] = unreached
+                    stack.pop()
+                    if via:
+                        via.pop()
+                    continue
+                v = head[a]
+                w = mate[v]
+                if w < 0:
+                    via.append(v)
+                    for u, v in zip(stack, via):
+                        mate[u], mate[v] = v, u
+                        layer[u] = unreached
+                    break
+                stack.append(w)
+                via.append(v)
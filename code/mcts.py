@@ -0,0 +1,202 @@
+"""
+mcts.py — AI Opponent Strategy Using Monte Carlo Tree Search
+-------------------------------------------------------------
+This module defines the MCTS class, an AI player for the boards too large for the Minmax search. It has the same
+interface as Minmax (terminal and move) and plays within a budget of iterations or seconds per move.
+
+Each iteration descends the tree with the UCT rule, adds one position to the tree (the cheapest move not tried
+yet), finishes the game with a rollout and counts the result in the positions of the descent. The result is a
+smoothed win of the AI, the sigmoid of utility / REWARD_SCALE, which plays better than counting only the wins,
+draws and losses: the rollouts are too noisy for the sign of the utility alone. In a rollout, the players take
+in turn the cheapest pair left, the costs being blurred by a random noise so that the rollouts differ.
+
+The tree is kept between moves: the position after the move of the opponent is looked up among the grandchildren
+of the previous root.
+
+Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mokline & Olivier de Boissieu
+"""
+
+import math
+import random
+import time
+
+from minmax import Bitboard
+
+EXPLORATION = math.sqrt(2)
+ROLLOUT_NOISE = 1
+REWARD_SCALE = 3
+
+
+class _Node:
+    """
+    Position of the search tree, reached by playing move (index of a pair) from the parent position.
+    ai tells whether the move was played by the AI, reward is the sum of the results of the iterations through
+    the node for the player of the move.
+    """
+    __slots__ = ("move", "parent", "ai", "free", "children", "untried", "visits", "reward")
+
+    def __init__(self, move, parent, ai, free, untried):
+        self.move = move
+        self.parent = parent
+        self.ai = ai
+        self.free = free
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.reward = 0
+
+
+class MCTS:
+    def __init__(self, grid, iterations=1000, time_budget=None, exploration=EXPLORATION,
+                 rollout_noise=ROLLOUT_NOISE, seed=None):
+        """
+        Initialize the MCTS AI with the given grid.
+
+        Parameters:
+        -----------
+        grid: Grid
+            The grid of the game, not modified during a game
+        iterations: int
+            Maximal number of iterations per move (None for no limit)
+        time_budget: float
+            Maximal time in seconds per move (None for no limit)
+        exploration: float
+            Exploration constant of the UCT rule
+        rollout_noise: float
+            Amplitude of the uniform noise added to the costs of the pairs in the rollouts
+        seed: int
+            Seed of the random generator, the moves are reproducible for a given seed and a budget of iterations
+        """
+        if iterations is None and time_budget is None:
+            raise Exception("A budget of iterations or time is required")
+        self.grid = grid
+        self.pairs = grid.all_pairs()
+        self.board = Bitboard(grid)
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.rollout_noise = rollout_noise
+        self.random = random.Random(seed)
+        self.root = None
+        # Move played from the root
+        self.played = None
+        # Number of iterations of the last move
+        self.last_iterations = 0
+
+    def terminal(self, used_cells):
+        """
+        Check if there are no possible moves left.
+        """
+        self.board.reset(used_cells)
+        return self.board.terminal()
+
+    def compute_score(self, pairs):
+        """
+        Compute the total score for a list of cell pairs.
+        """
+        return sum(abs(self.grid.value[c1[0]][c1[1]] - self.grid.value[c2[0]][c2[1]]) for c1, c2 in pairs)
+
+    def _untried(self):
+        """
+        Returns the moves of the position of the board, the cheapest last (they are expanded first).
+        """
+        costs = self.board.costs
+        return sorted(self.board.moves(), key=lambda k: (-costs[k], -k))
+
+    def _find_root(self):
+        """
+        Returns the node of the position of the board: the previous root if the position did not change, the
+        child of the move played from the previous root for the answer of the opponent if it is in the tree, and
+        a new node otherwise. (The other grandchildren with the same free cells do not have the same scores.)
+        """
+        free = self.board.free
+        if self.root is not None:
+            if self.root.free == free:
+                return self.root
+            for child in self.root.children:
+                if child.move != self.played:
+                    continue
+                for grandchild in child.children:
+                    if grandchild.free == free:
+                        grandchild.parent = None
+                        return grandchild
+        return _Node(None, None, False, free, self._untried())
+
+    def _select(self, node):
+        """
+        Returns the child of node maximizing the UCT value for the player to move.
+        """
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best, best_value = None, float("-inf")
+        for child in node.children:
+            value = child.reward / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    def _rollout(self, ai):
+        """
+        Finishes the game from the position of the board, the AI playing first if ai is True.
+        Returns the utility of the game: the opponent's score minus the AI's score.
+        """
+        board = self.board
+        free, masks, costs = board.free, board.masks, board.costs
+        noise, uniform = self.rollout_noise, self.random.random
+        utility = board.person_score - board.ai_score
+        for k in sorted(board.moves(), key=lambda k: costs[k] + noise * uniform()):
+            if free & masks[k] == masks[k]:
+                free ^= masks[k]
+                utility += -costs[k] if ai else costs[k]
+                ai = not ai
+        return utility
+
+    def _iterate(self, root, position):
+        """
+        Runs one iteration from root, whose position (free cells and scores) is given.
+        """
+        board = self.board
+        board.free, board.ai_score, board.person_score = position
+        node = root
+        while not node.untried and node.children:
+            node = self._select(node)
+            board.play(node.move, node.ai)
+        if node.untried:
+            move = node.untried.pop()
+            board.play(move, not node.ai)
+            child = _Node(move, node, not node.ai, board.free, self._untried())
+            node.children.append(child)
+            node = child
+
+        utility = self._rollout(not node.ai)
+        result = 0.5 + 0.5 * math.tanh(utility / (2 * REWARD_SCALE))
+        while node is not None:
+            node.visits += 1
+            node.reward += result if node.ai else 1 - result
+            node = node.parent
+
+    def move(self, used_cells, AIpairs, PersonPairs):
+        """
+        Choose a move with Monte Carlo Tree Search: the most visited move of the root after the iterations.
+        """
+        board = self.board
+        board.reset(used_cells, self.compute_score(AIpairs), self.compute_score(PersonPairs))
+        if board.terminal():
+            return None
+
+        root = self._find_root()
+        position = (board.free, board.ai_score, board.person_score)
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        iterations = 0
+        while (self.iterations is None or iterations < self.iterations) and \
+                (deadline is None or time.perf_counter() < deadline):
+            self._iterate(root, position)
+            iterations += 1
+        self.last_iterations = iterations
+        self.root = root
+
+        if root.children:
+            self.played = max(root.children, key=lambda child: (child.visits, -child.move)).move
+        else:
+            self.played = root.untried[-1]
+        return self.pairs[self.played]
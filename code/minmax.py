@@ -4,28 +4,320 @@ minmax.py — AI Opponent Strategy Using Minimax Algorithm
 This module defines the Minmax class which implements an AI player using
 the classical Minimax algorithm with recursion depth control.
 
+The moves are chosen by an alpha-beta search, which returns the same move as the full minimax. The moves are
+tried in an order that makes cutoffs happen early: the killer moves of the depth (moves that caused a cutoff
+in a sibling node), then the cheapest pairs, then the moves with the best history (cutoffs caused anywhere).
+The positions already searched, reached again through another order of the same moves, are found in a bounded
+transposition table keyed by the free cells.
+
+With a time budget, the search deepens iteratively: each iteration searches up to a depth, the positions at
+that depth being evaluated by a greedy playout of the remaining pairs, and the move of the last completed
+iteration is played. The deepening stops early when an iteration reaches the end of the game everywhere.
+
+With several processes, the first move of the root is searched first, then the other moves are searched in a
+pool of processes, each one with the best score known when it is submitted as bound. The move returned does not
+depend on the order in which the processes finish. The pool is started at the first move and kept for the whole
+game, so that the transposition tables of the workers are kept from one move to the next; close() stops it.
+
+When few cells can still be paired (endgame_cells) and they split into separate groups, the exact value of the
+rest of the game is computed by the Endgame solver of endgame.py, which memoizes it by the shapes of the groups.
+
+The search plays the moves on a Bitboard, where the free cells are the bits of an integer. The GameState keeps
+the pairs that can still be played up to date for the interface, without rescanning the grid.
+
 Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mokline & Olivier de Boissieu
 """
 
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from endgame import Endgame, store
+
 MAXIMUM_RECURSION_DEPTH = 100
+TRANSPOSITION_TABLE_SIZE = 1 << 20
+ENDGAME_CELLS = 12
 
+# Flags of the transposition table entries: the stored value is exact, a lower bound or an upper bound
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class _Timeout(Exception):
+    """
+    Raised in the search when the time budget of the move is exhausted.
+    """
+
+
+# AI of the current worker process, set once by _init_worker
+_worker_ai = None
+
+
+def _init_worker(grid, table_size, endgame_cells):
+    """
+    Sets up the AI of a worker process of the parallel search.
+    """
+    global _worker_ai
+    _worker_ai = Minmax(grid, table_size, endgame_cells=endgame_cells)
+
+
+def _search_move(free, ai_score, person_score, move, alpha, depth_limit, deadline):
+    """
+    Searches a move of the AI at the root (free cells and scores) in a worker process, with the window
+    (alpha, +inf). Returns the score and whether the search used heuristic evaluations, or (None, True) if the
+    deadline was reached.
+    """
+    ai = _worker_ai
+    board = ai.board
+    board.free, board.ai_score, board.person_score = free, ai_score, person_score
+    ai.depth_limit, ai.deadline, ai.cuts = depth_limit, deadline, 0
+    board.play(move, True)
+    try:
+        score = ai.alphabeta(False, 1, alpha, float("inf"))
+    except _Timeout:
+        return None, True
+    return score, ai.cuts > 0
+
+
+class GameState:
+    """
+    Position of a game: the used cells and the pairs that can still be played.
+
+    Each pair counts how many of its cells are used, so that playing or undoing a pair only updates the pairs of
+    its two cells (O(degree)) and the game is over when no pair is available (O(1)).
+
+    Attributes:
+    -----------
+    pairs: list[tuple[tuple[int]]]
+        All the pairs of the grid, in the order of grid.all_pairs()
+    used: set[tuple[int]]
+        The used cells
+    available: set[int]
+        Indices in pairs of the pairs whose two cells are free
+    """
+
+    def __init__(self, grid, pairs=None, used_cells=()):
+        self.pairs = grid.all_pairs() if pairs is None else pairs
+        self.incident = {}
+        for k, (c1, c2) in enumerate(self.pairs):
+            self.incident.setdefault(c1, []).append(k)
+            self.incident.setdefault(c2, []).append(k)
+        self.reset(used_cells)
+
+    def reset(self, used_cells=()):
+        """
+        Sets the position to the given used cells, in O(number of pairs).
+        """
+        self.used = set(used_cells)
+        self.blocked = [(c1 in self.used) + (c2 in self.used) for c1, c2 in self.pairs]
+        self.available = {k for k, count in enumerate(self.blocked) if count == 0}
+
+    def play(self, pair):
+        """
+        Plays a pair of free cells.
+        """
+        c1, c2 = pair
+        if c1 in self.used or c2 in self.used or c1 == c2:
+            raise Exception("Cell already used")
+        blocked, available = self.blocked, self.available
+        for cell in pair:
+            self.used.add(cell)
+            for k in self.incident.get(cell, ()):
+                if not blocked[k]:
+                    available.discard(k)
+                blocked[k] += 1
+
+    def undo(self, pair):
+        """
+        Undoes the last play of pair.
+        """
+        blocked, available = self.blocked, self.available
+        for cell in pair:
+            self.used.discard(cell)
+            for k in self.incident.get(cell, ()):
+                blocked[k] -= 1
+                if not blocked[k]:
+                    available.add(k)
+
+    def terminal(self):
+        """
+        Checks if there are no possible moves left.
+        """
+        return not self.available
+
+    def moves(self):
+        """
+        Returns the pairs that can be played, in the order of grid.all_pairs().
+        """
+        return [self.pairs[k] for k in sorted(self.available)]
+
+
+class Bitboard:
+    """
+    Compact position for the search: the free cells are the bits of an integer (the cell (i, j) is the bit
+    i * m + j) and the score of each player is an integer, so that playing or undoing a pair is a few integer
+    operations. The pairs are designated by their index in grid.all_pairs().
+
+    Attributes:
+    -----------
+    free: int
+        Mask of the free cells
+    ai_score: int
+        Sum of the costs of the pairs played by the AI
+    person_score: int
+        Sum of the costs of the pairs played by the opponent
+    partners: list[int]
+        Mask of the cells forming a valid pair with each cell
+    masks: list[int]
+        Mask of the two cells of each pair
+    costs: list[int]
+        Cost of each pair
+    horizontal, vertical: int
+        Masks of the cells forming a valid pair with the cell on their right, below them
+    """
 
-class Minmax:
     def __init__(self, grid):
+        src, dst, cost = grid.edges()
+        self.m = grid.m
+        self.full = (1 << (grid.n * grid.m)) - 1
+        self.masks = [(1 << a) | (1 << b) for a, b in zip(src.tolist(), dst.tolist())]
+        self.costs = cost.tolist()
+        self.partners = [0] * (grid.n * grid.m)
+        self.horizontal = self.vertical = 0
+        # Index of the pair of each cell and the cell on its right, below it
+        self.right, self.below = {}, {}
+        for k, (a, b) in enumerate(zip(src.tolist(), dst.tolist())):
+            self.partners[a] |= 1 << b
+            self.partners[b] |= 1 << a
+            if a // grid.m == b // grid.m:
+                self.horizontal |= 1 << a
+                self.right[a] = k
+            else:
+                self.vertical |= 1 << a
+                self.below[a] = k
+        self.reset()
+
+    def reset(self, used_cells=(), ai_score=0, person_score=0):
+        """
+        Sets the position to the given used cells and scores.
+        """
+        self.free = self.full
+        for i, j in used_cells:
+            self.free &= ~(1 << (i * self.m + j))
+        self.ai_score = ai_score
+        self.person_score = person_score
+
+    def play(self, k, ai):
+        """
+        Plays the pair of index k, by the AI if ai is True and by the opponent otherwise.
+        """
+        self.free ^= self.masks[k]
+        if ai:
+            self.ai_score += self.costs[k]
+        else:
+            self.person_score += self.costs[k]
+
+    def undo(self, k, ai):
+        """
+        Undoes play(k, ai).
+        """
+        self.free ^= self.masks[k]
+        if ai:
+            self.ai_score -= self.costs[k]
+        else:
+            self.person_score -= self.costs[k]
+
+    def terminal(self):
+        """
+        Checks if there are no possible moves left.
+        """
+        free = self.free
+        return not (free & (free >> 1) & self.horizontal or free & (free >> self.m) & self.vertical)
+
+    def active(self):
+        """
+        Returns the mask of the free cells that can still be paired.
+        """
+        free = self.free
+        horizontal = free & (free >> 1) & self.horizontal
+        vertical = free & (free >> self.m) & self.vertical
+        return horizontal | (horizontal << 1) | vertical | (vertical << self.m)
+
+    def greedy_playout(self, ai):
+        """
+        Estimates the rest of the game: the players take the cheapest pair left in turn (the AI first if ai is
+        True). Returns the change of the utility, the opponent's score minus the AI's score.
+        """
+        free, masks, costs = self.free, self.masks, self.costs
+        value = 0
+        for k in sorted(self.moves(), key=costs.__getitem__):
+            if free & masks[k] == masks[k]:
+                free ^= masks[k]
+                value += -costs[k] if ai else costs[k]
+                ai = not ai
+        return value
+
+    def moves(self):
+        """
+        Returns the indices of the pairs that can be played, in increasing order.
+        """
+        free = self.free
+        moves = []
+        for cells, index in ((free & (free >> 1) & self.horizontal, self.right),
+                             (free & (free >> self.m) & self.vertical, self.below)):
+            while cells:
+                low = cells & -cells
+                moves.append(index[low.bit_length() - 1])
+                cells ^= low
+        return moves
+
+
+class Minmax:
+    def __init__(self, grid, table_size=TRANSPOSITION_TABLE_SIZE, time_budget=None, processes=None,
+                 endgame_cells=ENDGAME_CELLS):
         """
         Initialize the Minmax AI with the given grid.
+        The valid pairs are computed once here, the grid is not modified during a game.
+        table_size is the maximal number of entries of the transposition table (and of each memo of the Endgame
+        solver).
+        time_budget is the time in seconds given to each move: if it is None, the search is exhaustive (up to
+        MAXIMUM_RECURSION_DEPTH moves), otherwise it deepens iteratively until the budget is exhausted.
+        processes is the number of processes searching the moves of the root, 1 (or None) for a serial search.
+        The pool of processes is kept until close() is called (or the end of a with block).
+        endgame_cells is the number of cells that can still be paired below which the Endgame solver gives the
+        exact value of the positions whose cells split into several components (0 to disable it).
         """
         self.grid = grid
+        self.pairs = grid.all_pairs()
+        # Position searched by alphabeta
+        self.board = Bitboard(grid)
+        # Move ordering heuristics: killers[depth] holds the last two moves that caused a cutoff at this depth,
+        # history[move] grows with the size of the subtrees cut by the move
+        self.killers = {}
+        self.history = [0] * len(self.pairs)
+        # Transposition table: free cells (with the bit side_bit if the AI is to move) -> (value of the rest of
+        # the game, flag, best move, number of moves searched or inf if the value does not depend on heuristic
+        # evaluations), in insertion order
+        self.side_bit = self.board.full + 1
+        self.table = {}
+        self.table_size = table_size
+        self.time_budget = time_budget
+        self.processes = processes
+        self.pool = None
+        self.endgame_cells = endgame_cells
+        self.endgame = Endgame(self.board, self.pairs, table_size)
+        self.deadline = None
+        self.depth_limit = MAXIMUM_RECURSION_DEPTH
+        # Number of positions searched and of heuristic evaluations used in the current search
+        self.nodes = 0
+        self.cuts = 0
+        # Depth of the last completed iteration of the last move searched with a time budget
+        self.completed_depth = 0
 
     def next_moves(self, used_cells):
         """
         Generate all valid and unplayed cell pairs.
         """
-        return [
-            (c1, c2)
-            for (c1, c2) in self.grid.all_pairs()
-            if self.grid.valid_pair(c1, c2) and c1 not in used_cells and c2 not in used_cells
-        ]
+        return [(c1, c2) for (c1, c2) in self.pairs if c1 not in used_cells and c2 not in used_cells]
 
     def terminal(self, used_cells):
         """
@@ -78,9 +370,238 @@ class Minmax:
                 best_score = min(score, best_score)
             return best_score
 
+    def order_moves(self, moves, depth, hash_move=None):
+        """
+        Sorts the moves (indices of pairs): the best move stored in the transposition table first, then the
+        killer moves of the depth, then by increasing cost, then by decreasing history.
+        """
+        killers = self.killers.get(depth, ())
+        costs, history = self.board.costs, self.history
+        return sorted(moves, key=lambda k: (k != hash_move, k not in killers, costs[k], -history[k]))
+
+    def _cutoff(self, move, depth, num_moves):
+        """
+        Records a move that caused a cutoff at depth, in a node with num_moves moves.
+        """
+        killers = self.killers.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[move] += num_moves * num_moves
+
+    def _store(self, key, value, flag, move, draft):
+        """
+        Stores an entry in the transposition table, evicting the oldest entry if the table is full.
+        """
+        store(self.table, key, (value, flag, move, draft), self.table_size)
+
+    def alphabeta(self, isMaximisingPlayer, depth, alpha, beta):
+        """
+        Alpha-beta version of minimax on the position self.board, with the same value whenever it lies strictly
+        between alpha and beta (otherwise the value returned is a bound beyond alpha or beta).
+        depth is the number of moves played since the root, the positions at self.depth_limit are evaluated by
+        Bitboard.greedy_playout.
+
+        Since the utility is additive, the value of the rest of the game only depends on the free cells and on the
+        player to move: it is stored in the transposition table under these keys, with a flag telling whether it
+        is exact or a bound.
+        """
+        board = self.board
+        self.nodes += 1
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise _Timeout()
+
+        key = board.free | self.side_bit if isMaximisingPlayer else board.free
+        balance = board.person_score - board.ai_score
+        remaining = self.depth_limit - depth
+        entry = self.table.get(key)
+        hash_move = None
+        if entry is not None:
+            value, flag, hash_move, draft = entry
+            if draft >= remaining:
+                if draft != float("inf"):
+                    self.cuts += 1
+                value += balance
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+
+        moves = board.moves()
+        if not moves:
+            return balance
+        active = board.active()
+        if bin(active).count("1") <= self.endgame_cells:
+            masks = self.endgame.split(active)
+            if len(masks) > 1:
+                score = balance + self.endgame.solve(masks, isMaximisingPlayer, alpha - balance, beta - balance)
+                flag = UPPER if score <= alpha else LOWER if score >= beta else EXACT
+                self._store(key, score - balance, flag, None, float("inf"))
+                return score
+        if remaining <= 0:
+            self.cuts += 1
+            return balance + board.greedy_playout(isMaximisingPlayer)
+
+        cuts = self.cuts
+        window = (alpha, beta)
+        best_move = None
+        if isMaximisingPlayer:
+            best_score = float("-inf")
+            for move in self.order_moves(moves, depth, hash_move):
+                board.play(move, True)
+                score = self.alphabeta(False, depth + 1, alpha, beta)
+                board.undo(move, True)
+                if score > best_score:
+                    best_score = score
+                    best_move = move
+                    if score >= beta:
+                        self._cutoff(move, depth, len(moves))
+                        break
+                    alpha = max(alpha, score)
+        else:
+            best_score = float("inf")
+            for move in self.order_moves(moves, depth, hash_move):
+                board.play(move, False)
+                score = self.alphabeta(True, depth + 1, alpha, beta)
+                board.undo(move, False)
+                if score < best_score:
+                    best_score = score
+                    best_move = move
+                    if score <= alpha:
+                        self._cutoff(move, depth, len(moves))
+                        break
+                    beta = min(beta, score)
+
+        flag = UPPER if best_score <= window[0] else LOWER if best_score >= window[1] else EXACT
+        draft = remaining if self.cuts > cuts else float("inf")
+        self._store(key, best_score - balance, flag, best_move, draft)
+        return best_score
+
+    def search_root(self, moves, depth_limit, first_move=None, pool=None):
+        """
+        Searches the moves of the AI at the root (self.board) up to depth_limit moves, trying first_move first.
+
+        Among the moves of best score, the first one in the order of next_moves is chosen, as move_minimax does:
+        the scores are integers, so searching each move with the window (best score - 1, +inf) tells whether it
+        ties with the best move found so far.
+
+        If a pool of processes is given, the moves after the first one are searched in the pool, at most two
+        per process at a time, with the best score known when they are submitted. A move searched with a lower
+        bound than the best move still returns its exact score if it is at least the best score, so the move
+        chosen is the same as in the serial search.
+
+        Output:
+        -------
+        best_move: int
+            Index of the best move
+        exact: bool
+            Whether the search reached the end of the game everywhere, without heuristic evaluation
+        """
+        board = self.board
+        self.depth_limit = depth_limit
+        self.cuts = 0
+        best_score = float("-inf")
+        best_move = None
+        ordered = self.order_moves(moves, 0, first_move)
+        for move in ordered if pool is None else ordered[:1]:
+            board.play(move, True)
+            score = self.alphabeta(False, 1, best_score - 1, float("inf"))
+            board.undo(move, True)
+            if score > best_score or (score == best_score and move < best_move):
+                best_score = score
+                best_move = move
+        if pool is None:
+            return best_move, self.cuts == 0
+
+        exact = self.cuts == 0
+        position = (board.free, board.ai_score, board.person_score)
+        pending = deque()
+
+        def collect(best_score, best_move, exact):
+            move, future = pending.popleft()
+            score, cut = future.result()
+            if score is None:
+                raise _Timeout()
+            if score > best_score or (score == best_score and move < best_move):
+                best_score, best_move = score, move
+            return best_score, best_move, exact and not cut
+
+        try:
+            for move in ordered[1:]:
+                if len(pending) >= 2 * self.processes:
+                    best_score, best_move, exact = collect(best_score, best_move, exact)
+                pending.append((move, pool.submit(_search_move, *position, move, best_score - 1, depth_limit,
+                                                  self.deadline)))
+            while pending:
+                best_score, best_move, exact = collect(best_score, best_move, exact)
+        finally:
+            # The searches still waiting are useless after a timeout (the running ones stop at the deadline)
+            for _, future in pending:
+                future.cancel()
+        return best_move, exact
+
     def move(self, used_cells, AIpairs, PersonPairs):
         """
-        Choose the best move using the minimax algorithm.
+        Choose the best move using the minimax algorithm, computed by an alpha-beta search.
+
+        Without time budget, the search is exhaustive and returns the move of move_minimax. With a time budget,
+        the search deepens iteratively and returns the best move of the last completed iteration (the cheapest
+        move if not even the first iteration completes). The transposition table (and the pool of processes,
+        with the tables of the workers) is kept from one move to the next.
+        """
+        board = self.board
+        board.reset(used_cells, self.compute_score(AIpairs), self.compute_score(PersonPairs))
+        moves = board.moves()
+        if not moves:
+            return None
+
+        self.killers = {}
+        self.nodes = 0
+        pool = None
+        if self.processes is not None and self.processes > 1 and len(moves) > 1:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                                initargs=(self.grid, self.table_size, self.endgame_cells))
+            pool = self.pool
+        try:
+            if self.time_budget is None:
+                best_move, _ = self.search_root(moves, MAXIMUM_RECURSION_DEPTH, pool=pool)
+                return self.pairs[best_move]
+
+            self.deadline = time.perf_counter() + self.time_budget
+            best_move = self.order_moves(moves, 0)[0]
+            self.completed_depth = 0
+            try:
+                for depth_limit in range(1, MAXIMUM_RECURSION_DEPTH + 1):
+                    best_move, exact = self.search_root(moves, depth_limit, best_move, pool)
+                    self.completed_depth = depth_limit
+                    if exact:
+                        break
+            except _Timeout:
+                pass
+            return self.pairs[best_move]
+        finally:
+            self.deadline = None
+
+    def close(self):
+        """
+        Stops the pool of processes of the parallel search, if it was started.
+        """
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def move_minimax(self, used_cells, AIpairs, PersonPairs):
+        """
+        Choose the best move using the full minimax algorithm (reference for move, much slower).
         """
         if self.terminal(used_cells):
             return None
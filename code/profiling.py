@@ -0,0 +1,108 @@
+"""
+profiling.py — Per-Phase Profiling of Grids and Solvers
+--------------------------------------------------------
+This module provides the Profiler that Grid.grid_from_file and the solvers report their phases to (reading,
+pair generation, graph building, matching...). Each phase records its wall time, optionally the peak memory
+allocated during the phase (with tracemalloc), and the sizes the code attaches to it (cells, edges, pairs...).
+
+Profiling is disabled by default: the solvers then report to NULL_PROFILER, whose phases do nothing.
+
+    profiler = Profiler(memory=True)
+    solver = SolverMaxWeightMatching(grid)
+    solver.profiler = profiler
+    solver.run()
+    print(profiler)
+
+Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mokline & Olivier de Boissieu
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Profiler:
+    """
+    Records the phases of a computation.
+
+    Attributes:
+    -----------
+    phases: list[dict]
+        One record per finished phase, in order: {"name", "time" (seconds), "peak_memory" (bytes, if memory is
+        True), and the sizes attached to the phase}
+    memory: bool
+        Whether the peak memory of each phase is measured (which slows down the computation)
+    hook: function
+        If given, called with each record when its phase ends
+    """
+
+    def __init__(self, memory=False, hook=None):
+        self.phases = []
+        self.memory = memory
+        self.hook = hook
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Context manager measuring a phase. It yields the record of the phase, in which sizes can be stored:
+
+            with profiler.phase("pairs") as phase:
+                src, dst, cost = grid.edges()
+                phase["edges"] = len(src)
+        """
+        record = {"name": name}
+        started = False
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started = True
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["time"] = time.perf_counter() - start
+            if self.memory:
+                record["peak_memory"] = tracemalloc.get_traced_memory()[1] - base
+                if started:
+                    tracemalloc.stop()
+            self.phases.append(record)
+            if self.hook is not None:
+                self.hook(record)
+
+    def totals(self):
+        """
+        Returns the total time of the phases of each name.
+        """
+        totals = {}
+        for record in self.phases:
+            totals[record["name"]] = totals.get(record["name"], 0) + record["time"]
+        return totals
+
+    def __str__(self):
+        lines = []
+        for record in self.phases:
+            sizes = " ".join(f"{key}={value}" for key, value in record.items() if key not in ("name", "time"))
+            lines.append(f"{record['name']:<20}{record['time']:>10.4f}s  {sizes}")
+        return "\n".join(lines)
+
+
+class _NullProfiler:
+    """
+    Profiler used when profiling is disabled: phase returns a context manager that records nothing, always the
+    same one, so that a disabled phase costs a method call. Each phase yields a new empty record, thrown away at
+    the end of the phase, so that the sizes stored by the callers are not shared between phases or threads.
+    """
+
+    def phase(self, name):
+        return self
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, *exception):
+        return False
+
+
+NULL_PROFILER = _NullProfiler()
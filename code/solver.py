@@ -1,82 +1,729 @@
 """
 solver.py — Implementation of Greedy and Max Weight Matching Solvers
 ---------------------------------------------------------------------
-This module provides two solver classes:
+This module provides the Solver base class and the solver classes:
 - SolverGreedy: selects pairs with minimum absolute difference greedily.
-- SolverMaxWeightMatching: uses the Hungarian algorithm for optimal pairing.
+- SolverPathGrowing: linear time pairing, which saves at least half of what the optimal pairing saves.
+- SolverAnytime: best pairing found within a time budget, with a lower bound on the optimal score.
+- SolverMatching: maximum number of pairs (Hopcroft-Karp), optimal when every value is 1.
+- SolverMaxWeightMatching: optimal pairing, as a minimum cost matching between even and odd cells.
+- SolverDynamic: optimal pairing, repaired locally when a few cells change.
+- SolverMaxWeightMatching2: optimal pairing for the variant where white cells need not be adjacent.
 
 Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mokline & Olivier de Boissieu
 """
 
-from grid import Grid
-import networkx as nx
+import heapq
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+from grid import Grid, COLOR_COMPATIBILITY, BLACK
+from flow import MinCostFlow, INFINITE_CAPACITY
+from matching import MinCostMatching, max_cardinality_matching
+from profiling import NULL_PROFILER
+import numpy as np
 
-class SolverGreedy:
+
+def _match_edges(even, odd, cost):
+    """
+    Minimum cost matching on the edges even[k] - odd[k] (cell ids), renumbered locally so that the engine
+    only allocates the cells involved. Returns the matched (even, odd) cell ids.
+    Defined at module level so that it can run in a worker process.
+    """
+    nodes, local = np.unique(np.concatenate((even, odd)), return_inverse=True)
+    engine = MinCostMatching(len(nodes), local[:len(even)], local[len(even):], cost)
+    engine.solve()
+    matched_even, matched_odd = engine.pairs()
+    return nodes[matched_even], nodes[matched_odd]
+
+
+def _balanced_batches(bounds, count):
+    """
+    Packs the components, whose pairs are the slices bounds[k]:bounds[k + 1], into at most count batches of
+    balanced numbers of pairs: each component, the largest first, goes into the batch with the fewest pairs.
+    Returns the indices of the pairs of each non-empty batch.
+    """
+    sizes = np.diff(bounds)
+    batch = np.zeros(len(sizes), dtype=np.int64)
+    heap = [(0, k) for k in range(count)]
+    for component in np.argsort(-sizes, kind="stable").tolist():
+        load, k = heapq.heappop(heap)
+        batch[component] = k
+        heapq.heappush(heap, (load + int(sizes[component]), k))
+    pair_batch = np.repeat(batch, sizes)
+    batches = [np.flatnonzero(pair_batch == k) for k in range(count)]
+    return [indices for indices in batches if len(indices)]
+
+
+def _bucket_order(cost):
+    """
+    Stable order of the pairs by increasing cost. The costs are small non-negative integers: on 16-bit keys the
+    stable sort of numpy is a radix sort, i.e. a counting sort into buckets, linear in the number of pairs.
+    """
+    if len(cost) > 0 and cost.max() < 1 << 16:
+        return np.argsort(cost.astype(np.uint16), kind="stable")
+    return np.argsort(cost, kind="stable")
+
+
+def _saving_bound(grid):
+    """
+    Upper bound on the saving of any pairing (pairing two cells of values v1 and v2 saves 2 * min(v1, v2) on the
+    sum of the values): every pair has an even cell and an odd cell, so the saving is at most the sum over the
+    even (or odd) cells of the largest saving of a pair containing the cell.
+    """
+    value = grid.value_array.ravel()
+    even, odd, _ = grid.bipartite_edges()
+    saving = 2 * np.minimum(value[even], value[odd])
+    best_even = np.zeros(grid.n * grid.m, dtype=np.int64)
+    best_odd = np.zeros(grid.n * grid.m, dtype=np.int64)
+    np.maximum.at(best_even, even, saving)
+    np.maximum.at(best_odd, odd, saving)
+    return min(int(best_even.sum()), int(best_odd.sum()))
+
+
+class Solver:
     def __init__(self, grid):
         """
-        Initialize the greedy solver with a given grid.
+        Initialize the solver with a given grid, with no pair chosen yet.
+        Set self.profiler to a profiling.Profiler to record the phases of run (disabled by default).
         """
         self.grid = grid
         self.pairs = []
+        self.profiler = NULL_PROFILER
+
+    def score(self):
+        """
+        Return the score of the current pairs: the cost of each pair plus the value of each unpaired
+        non-black cell.
+        """
+        return self.grid.score(self.pairs)
+
+
+class SolverGreedy(Solver):
+    def __init__(self, grid, improvement_passes=0):
+        """
+        Initialize the greedy solver.
+
+        If improvement_passes is positive, the greedy pairing is then improved by at most this number of passes of
+        local search (see improve), each of which takes a time linear in the size of the grid.
+        """
+        super().__init__(grid)
+        self.improvement_passes = improvement_passes
 
     def run(self):
         """
         Run the greedy pairing algorithm.
         Selects pairs with smallest value difference, avoids conflicts.
+        Returns the pairs and their score.
         """
-        self.pairs = []
-        used = set()
+        profiler = self.profiler
+        n_cells = self.grid.n * self.grid.m
+        with profiler.phase("pairs") as phase:
+            src, dst, cost = self.grid.edges()
+            phase["cells"], phase["edges"] = n_cells, len(src)
+
+        # Sort by increasing cost, ties broken by cell ids (i.e. in row-major order). The key 2 * src + vertical
+        # is distinct for every pair, so placing each pair at its key gives the row-major order, then the pairs
+        # are bucketed by cost (stable)
+        with profiler.phase("sort"):
+            slot = np.full(2 * n_cells, -1, dtype=np.intp)
+            slot[2 * src + (dst - src == self.grid.m)] = np.arange(len(src))
+            order = slot[slot >= 0]
+            order = order[_bucket_order(cost[order])]
+
+        with profiler.phase("select") as phase:
+            used = bytearray(n_cells)
+            chosen_src, chosen_dst = [], []
+            for a, b in zip(src[order].tolist(), dst[order].tolist()):
+                if not used[a] and not used[b]:
+                    chosen_src.append(a)
+                    chosen_dst.append(b)
+                    used[a] = used[b] = 1
+            phase["pairs"] = len(chosen_src)
+
+        if self.improvement_passes > 0:
+            with profiler.phase("improve") as phase:
+                mate = [-1] * n_cells
+                for a, b in zip(chosen_src, chosen_dst):
+                    mate[a], mate[b] = b, a
+                phase["gain"] = self.improve(mate, self.improvement_passes)
+                chosen_src = [a for a in range(n_cells) if a < mate[a]]
+                chosen_dst = [mate[a] for a in chosen_src]
+                phase["pairs"] = len(chosen_src)
+
+        self.pairs = self.grid.pairs_from_ids(chosen_src, chosen_dst)
+        return self.pairs, self.grid.score_ids(chosen_src, chosen_dst)
+
+    def improve(self, mate, passes):
+        """
+        Improves a pairing by local search, in place.
+
+        Each pass goes over the unpaired cells u and applies the best of the following moves if it lowers the
+        score (pairing two cells of values v1 and v2 lowers the score by 2 * min(v1, v2)):
+        - pair u with an unpaired neighbour v,
+        - take the neighbour v from its pair (v, w), w being left unpaired (alternating path u - v - w),
+        - take the neighbour v from its pair (v, w) and pair w with one of its unpaired neighbours x
+          (augmenting path u - v - w - x).
+        A pass is linear in the size of the grid, the search stops after a pass without improvement.
+
+        Parameters:
+        -----------
+        mate: list[int]
+            mate[k] is the id of the cell paired with the cell k, or -1 if k is unpaired
+        passes: int
+            Maximal number of passes
+
+        Output:
+        -------
+        gain: int
+            Decrease of the score
+        """
+        indptr, indices, _ = self.grid.adjacency()
+        indptr, indices = indptr.tolist(), indices.tolist()
+        value = self.grid.value_array.ravel().tolist()
+        total = 0
+        for _ in range(passes):
+            gain = 0
+            for u in range(len(mate)):
+                if mate[u] >= 0 or indptr[u] == indptr[u + 1]:
+                    continue
+                vu = value[u]
+                best, move = 0, None
+                for v in indices[indptr[u]:indptr[u + 1]]:
+                    w = mate[v]
+                    pair_gain = 2 * min(vu, value[v])
+                    if w < 0:
+                        if pair_gain > best:
+                            best, move = pair_gain, (v, -1, -1)
+                        continue
+                    swap_gain = pair_gain - 2 * min(value[v], value[w])
+                    if swap_gain > best:
+                        best, move = swap_gain, (v, w, -1)
+                    vw = value[w]
+                    for x in indices[indptr[w]:indptr[w + 1]]:
+                        if mate[x] < 0 and x != u and swap_gain + 2 * min(vw, value[x]) > best:
+                            best, move = swap_gain + 2 * min(vw, value[x]), (v, w, x)
+                if move is None:
+                    continue
+                v, w, x = move
+                mate[u], mate[v] = v, u
+                if w >= 0:
+                    mate[w] = x
+                if x >= 0:
+                    mate[x] = w
+                gain += best
+            total += gain
+            if gain == 0:
+                break
+        return total
+
+
+class SolverPathGrowing(Solver):
+    """
+    Linear time approximation with the path growing algorithm of Drake and Hougardy.
+
+    Pairing two cells of values v1 and v2 saves w = 2 * min(v1, v2) on the score (the sum of the values of the
+    non-black cells). A path is grown from a cell by following, from each new end, the pair of largest saving
+    whose other cell is not yet on a path; the cells left behind are removed. The best pairing of each path is
+    then found by dynamic programming. The pairs of a grown path include the heaviest pair of each of its cells
+    at the time it was added, which gives the classical bound: the saving is at least half the saving of the
+    optimal pairing. Each cell is visited a bounded number of times, so the time is linear in the size of the grid.
+
+    Attributes:
+    -----------
+    approximation_ratio: float
+        Proven worst-case ratio between the saving of the solution and the optimal saving
+    """
+
+    approximation_ratio = 0.5
+
+    def run(self):
+        """
+        Run the path growing algorithm and returns the pairs.
+        """
+        profiler = self.profiler
+        n_cells = self.grid.n * self.grid.m
+        with profiler.phase("graph") as phase:
+            indptr, indices, _ = self.grid.adjacency()
+            value = self.grid.value_array.ravel()
+            cell = np.repeat(np.arange(n_cells), np.diff(indptr))
+            saving = (2 * np.minimum(value[cell], value[indices])).tolist()
+            indptr, indices = indptr.tolist(), indices.tolist()
+            phase["cells"], phase["edges"] = n_cells, len(indices) // 2
+        with profiler.phase("paths") as phase:
+            chosen_src, chosen_dst = self._grow_paths(n_cells, indptr, indices, saving)
+            phase["pairs"] = len(chosen_src)
+
+        src, dst = np.minimum(chosen_src, chosen_dst), np.maximum(chosen_src, chosen_dst)
+        self.pairs = self.grid.pairs_from_ids(src, dst)
+        return self.pairs
+
+    def _grow_paths(self, n_cells, indptr, indices, saving):
+        """
+        Grows the paths and pairs each of them optimally (see the class documentation) on the adjacency given as
+        lists, saving[a] being the saving of the pair of the arc a. Returns the chosen pairs as two lists of ids.
+        """
+        removed = bytearray(n_cells)
+        chosen_src, chosen_dst = [], []
+        for start in range(n_cells):
+            if removed[start] or indptr[start] == indptr[start + 1]:
+                continue
+            # Grow a path from start, weights[k] is the saving of the pair (path[k], path[k + 1])
+            path, weights = [start], []
+            x = start
+            while True:
+                removed[x] = 1
+                best, y = -1, -1
+                for a in range(indptr[x], indptr[x + 1]):
+                    if saving[a] > best and not removed[indices[a]]:
+                        best, y = saving[a], indices[a]
+                if y < 0:
+                    break
+                path.append(y)
+                weights.append(best)
+                x = y
+            if not weights:
+                continue
+
+            # Best pairing of the path: total[k] is the best saving using the pairs among the first k
+            total = [0, 0]
+            for k, w in enumerate(weights):
+                total.append(max(total[k + 1], total[k] + w))
+            k = len(weights)
+            while k > 0:
+                if total[k + 1] == total[k]:
+                    k -= 1
+                else:
+                    chosen_src.append(path[k - 1])
+                    chosen_dst.append(path[k])
+                    k -= 2
+        return chosen_src, chosen_dst
+
+    def lower_bound(self):
+        """
+        Returns a lower bound on the optimal score, from two upper bounds on the optimal saving: the saving of the
+        current solution divided by the approximation ratio, and the bound of _saving_bound.
+        """
+        value = self.grid.value_array
+        total = int(value[self.grid.color_array != BLACK].sum())
+        saving = total - self.score()
+        return total - min(int(saving / self.approximation_ratio), _saving_bound(self.grid))
+
+
+class SolverAnytime(Solver):
+    """
+    Solver with a time budget, which returns the best pairing found when the budget runs out.
+
+    A valid pairing is available at once from the greedy solver. It is then improved by the local search passes
+    of SolverGreedy.improve, then replaced by the matchings of the exact engine (the one of
+    SolverMaxWeightMatching) phase after phase, whenever they are better. After each phase of cost c < 0 (the
+    cost of its augmenting paths), the later augmenting paths cost at least c each and there are at most as many
+    as the free even (or odd) cells, which bounds the optimal score from below. When the engine finishes, the
+    pairing is optimal and the bound is reached.
+
+    The deadline is checked between two passes or phases, so the time budget can be exceeded by one of them.
+    """
+
+    def __init__(self, grid, time_budget, callback=None):
+        """
+        Initialize the solver.
+
+        Parameters:
+        -----------
+        grid: Grid
+            The grid
+        time_budget: float
+            Time budget in seconds
+        callback: function
+            If given, called as callback(score, lower_bound) each time the best score or the lower bound changes
+        """
+        super().__init__(grid)
+        self.time_budget = time_budget
+        self.callback = callback
+        self.optimal = False
+        self._best_score = None
+        self._lower_bound = None
+
+    def _report(self, pairs, score, lower_bound):
+        """
+        Keeps the pairs if their score is the best so far (pairs may be a function returning them, called only
+        then) and the lower bound if it is the largest so far, then calls the callback.
+        """
+        changed = False
+        if self._best_score is None or score < self._best_score:
+            self.pairs = pairs() if callable(pairs) else pairs
+            self._best_score = score
+            changed = True
+        if self._lower_bound is None or lower_bound > self._lower_bound:
+            self._lower_bound = lower_bound
+            changed = True
+        if changed and self.callback is not None:
+            self.callback(self._best_score, self._lower_bound)
+
+    def run(self):
+        """
+        Run the solver until the pairing is optimal or the time budget runs out, and returns the best pairs.
+        """
+        deadline = time.monotonic() + self.time_budget
+        grid = self.grid
+        n_cells = grid.n * grid.m
+        value = grid.value_array.ravel()
+        total = int(value[grid.color_array.ravel() != BLACK].sum())
+        self.optimal = False
+        self._best_score = self._lower_bound = None
+
+        greedy = SolverGreedy(grid)
+        greedy.profiler = self.profiler
+        pairs, score = greedy.run()
+        self._report(pairs, score, total - _saving_bound(grid))
 
-        # Generate all valid pairs with their associated cost
-        all_pairs = [
-            (abs(self.grid.value[c1[0]][c1[1]] - self.grid.value[c2[0]][c2[1]]), c1, c2)
-            for (c1, c2) in self.grid.all_pairs()
-            if self.grid.valid_pair(c1, c2)
-        ]
+        # Local search on the greedy pairing
+        mate = [-1] * n_cells
+        if pairs:
+            for a, b in zip(*(ids.tolist() for ids in grid.pair_ids(pairs))):
+                mate[a], mate[b] = b, a
+        while time.monotonic() < deadline:
+            with self.profiler.phase("improve"):
+                gain = greedy.improve(mate, 1)
+            if gain == 0:
+                break
+            score -= gain
+            src = [a for a in range(n_cells) if a < mate[a]]
+            self._report(grid.pairs_from_ids(src, [mate[a] for a in src]), score, self._lower_bound)
 
-        # Sort by increasing cost
-        all_pairs.sort()
+        # Exact engine, one phase at a time
+        if time.monotonic() < deadline:
+            even, odd, cost = grid.bipartite_edges()
+            engine = MinCostMatching(n_cells, even, odd, cost - value[even] - value[odd])
 
-        for _, c1, c2 in all_pairs:
-            if c1 not in used and c2 not in used:
-                self.pairs.append((c1, c2))
-                used.update([c1, c2])
+            def engine_pairs():
+                matched_even, matched_odd = engine.pairs()
+                return grid.pairs_from_ids(np.minimum(matched_even, matched_odd), np.maximum(matched_even, matched_odd))
 
+            while time.monotonic() < deadline:
+                with self.profiler.phase("engine phase") as phase:
+                    path_cost, phase["augmented"] = engine.phase()
+                score = total + engine.cost()
+                if path_cost is None:
+                    self.optimal = True
+                    self._report(engine_pairs, score, score)
+                    break
+                remaining = min(len(engine.free_left()), len(engine.free_right()))
+                self._report(engine_pairs, score, score + path_cost * remaining)
         return self.pairs
 
     def score(self):
         """
-        Return the total score for the greedy solution.
+        Returns the best score found. Raises an exception if the solver has not been run.
         """
-        return self.grid.score(self.pairs)
+        if self._best_score is None:
+            raise Exception("The solver has not been run")
+        return self._best_score
+
+    def lower_bound(self):
+        """
+        Returns the best lower bound found on the optimal score. Raises an exception if the solver has not been run.
+        """
+        if self._lower_bound is None:
+            raise Exception("The solver has not been run")
+        return self._lower_bound
+
+    def gap(self):
+        """
+        Returns the gap between the best score found and the lower bound (0 once the pairing is optimal).
+        Raises an exception if the solver has not been run.
+        """
+        return self.score() - self.lower_bound()
+
+
+class SolverMatching(Solver):
+    def run(self):
+        """
+        Run the Hopcroft-Karp algorithm on the bipartite graph between even and odd cells.
+        When every value is 1, a pair costs 0 and each unpaired cell costs 1, so taking as many pairs
+        as possible is optimal. Returns the score.
+        """
+        profiler = self.profiler
+        with profiler.phase("pairs") as phase:
+            even, odd, _ = self.grid.bipartite_edges()
+            phase["cells"], phase["edges"] = self.grid.n * self.grid.m, len(even)
+        with profiler.phase("matching"):
+            mate = max_cardinality_matching(self.grid.n * self.grid.m, even, odd)
+        even = np.unique(even)
+        odd = np.array([mate[u] for u in even.tolist()], dtype=np.int64)
+        even = even[odd >= 0]
+        odd = odd[odd >= 0]
+        self.pairs = self.grid.pairs_from_ids(np.minimum(even, odd), np.maximum(even, odd))
+        return self.grid.score_ids(even, odd)
+
+
+class SolverMaxWeightMatching(Solver):
+    def __init__(self, grid, processes=None, parallel_threshold=5000):
+        """
+        Initialize the optimal matching solver.
+
+        The graph of valid pairs is split into its connected components, which are solved independently.
+        When the grid has at least parallel_threshold pairs in all, the components are packed into batches of
+        balanced numbers of pairs, one per process (processes, by default one per core): the current process
+        solves the first batch and a pool of processes the others.
+        """
+        super().__init__(grid)
+        self.processes = processes
+        self.parallel_threshold = parallel_threshold
+
+    def run(self):
+        """
+        Run the optimal matching algorithm.
+
+        Every valid pair joins an even cell to an odd cell, so the problem is a minimum cost matching in a
+        bipartite graph. Pairing two cells of values v1 and v2 changes the score by |v1 - v2| - v1 - v2, which
+        is the cost given to the edge; the matching engine works directly on the cell ids.
+        """
+        profiler = self.profiler
+        with profiler.phase("pairs") as phase:
+            even, odd, cost = self.grid.bipartite_edges()
+            value = self.grid.value_array.ravel()
+            cost = cost - value[even] - value[odd]
+            phase["cells"], phase["edges"] = self.grid.n * self.grid.m, len(even)
+
+        # Group the pairs by component, and the components into balanced batches solved in parallel
+        with profiler.phase("components") as phase:
+            label = self.grid.components()[even]
+            order = np.argsort(label, kind="stable")
+            even, odd, cost, label = even[order], odd[order], cost[order], label[order]
+            starts = np.flatnonzero(np.concatenate(([True], label[1:] != label[:-1]))) if len(label) else label
+            bounds = np.append(starts, len(label))
+            workers = min(len(starts), self.processes or os.cpu_count() or 1)
+            batches = []
+            if workers > 1 and len(label) >= self.parallel_threshold:
+                batches = _balanced_batches(bounds, workers)
+            phase["components"], phase["batches"] = len(starts), len(batches)
+
+        with profiler.phase("matching") as phase:
+            if len(batches) > 1:
+                with ProcessPoolExecutor(max_workers=len(batches) - 1) as pool:
+                    futures = [pool.submit(_match_edges, even[batch], odd[batch], cost[batch])
+                               for batch in batches[1:]]
+                    first = batches[0]
+                    results = [_match_edges(even[first], odd[first], cost[first])]
+                    results += [future.result() for future in futures]
+            else:
+                results = [_match_edges(even, odd, cost)]
+            even = np.concatenate([r[0] for r in results])
+            odd = np.concatenate([r[1] for r in results])
+            phase["pairs"] = len(even)
+
+        self.pairs = self.grid.pairs_from_ids(np.minimum(even, odd), np.maximum(even, odd))
+        return self.pairs
+
+
+class SolverDynamic(Solver):
+    """
+    Optimal solver that accepts changes of cells and repairs its solution instead of solving again.
+
+    Leaving a cell unpaired is modelled by pairing it with a dummy copy of itself: each even cell e gets a dummy
+    on the odd side (edge e - e~ of cost 0), each odd cell o a dummy on the even side (edge o~ - o of cost 0),
+    and the dummies o~ - e~ of two adjacent cells are joined by an edge of cost 0, so that two paired cells
+    leave their dummies paired together. The optimal pairing is then a minimum cost perfect matching of this
+    doubled graph, which can be repaired by shortest paths from the few nodes freed by a change
+    (see MinCostMatching.update).
 
+    Every adjacent pair of cells has an edge, of cost |v1 - v2| - v1 - v2 if the pair is valid and 0 otherwise,
+    so that a change of color only changes costs; the invalid pairs of the matching are left out of the solution.
+    """
 
-class SolverMaxWeightMatching:
     def __init__(self, grid):
+        super().__init__(grid)
+        self.matching = None
+        self._pairs = []
+        self._cost = 0
+        self._total = 0
+
+    @property
+    def pairs(self):
         """
-        Initialize the Hungarian (maximum weight matching) solver.
+        The pairs of the current solution, extracted from the matching on first access after a change.
         """
-        self.grid = grid
-        self.pairs = []
+        if self._pairs is None:
+            n_cells = self.grid.n * self.grid.m
+            mate = np.array(self.matching.mate[:n_cells], dtype=np.int64)
+            color = self.grid.color_array.ravel()
+            i, j = np.divmod(np.arange(n_cells), self.grid.m)
+            even = np.flatnonzero(((i + j) % 2 == 0) & (mate >= 0) & (mate < n_cells))
+            even = even[COLOR_COMPATIBILITY[color[even], color[mate[even]]]]
+            odd = mate[even]
+            self._pairs = self.grid.pairs_from_ids(np.minimum(even, odd), np.maximum(even, odd))
+        return self._pairs
+
+    @pairs.setter
+    def pairs(self, pairs):
+        self._pairs = pairs
+
+    def _pair_cost(self, even, odd):
+        """
+        Cost of the edge between the adjacent cells even and odd (cell ids).
+        """
+        m = self.grid.m
+        color, value = self.grid.color_array, self.grid.value_array
+        c1, c2 = color[even // m, even % m], color[odd // m, odd % m]
+        if not COLOR_COMPATIBILITY[c1, c2]:
+            return 0
+        return -2 * int(min(value[even // m, even % m], value[odd // m, odd % m]))
 
     def run(self):
         """
-        Run the optimal matching algorithm using NetworkX’s max_weight_matching.
+        Solves the doubled graph from scratch and returns the pairs.
+        """
+        n, m = self.grid.n, self.grid.m
+        n_cells = n * m
+        ids = np.arange(n_cells, dtype=np.int64).reshape(n, m)
+        src = np.concatenate((ids[:, :-1].ravel(), ids[:-1, :].ravel()))
+        dst = np.concatenate((ids[:, 1:].ravel(), ids[1:, :].ravel()))
+        i, j = np.divmod(src, m)
+        src_is_even = (i + j) % 2 == 0
+        even, odd = np.where(src_is_even, src, dst), np.where(src_is_even, dst, src)
+        color, value = self.grid.color_array.ravel(), self.grid.value_array.ravel()
+        cost = np.where(COLOR_COMPATIBILITY[color[even], color[odd]], -2 * np.minimum(value[even], value[odd]), 0)
+
+        i, j = np.divmod(ids.ravel(), m)
+        is_even = (i + j) % 2 == 0
+        cells_even, cells_odd = ids.ravel()[is_even], ids.ravel()[~is_even]
+        left = np.concatenate((even, cells_even, n_cells + cells_odd, n_cells + odd))
+        right = np.concatenate((odd, n_cells + cells_even, cells_odd, n_cells + even))
+        costs = np.concatenate((cost, np.zeros(n_cells + len(even), dtype=np.int64)))
+        with self.profiler.phase("matching") as phase:
+            self.matching = MinCostMatching(2 * n_cells, left, right, costs, perfect=True)
+            self._cost = self.matching.solve()
+            phase["cells"], phase["edges"] = n_cells, len(left)
+        self._total = int(value[color != BLACK].sum())
+        self._pairs = None
+        return self.pairs
+
+    def update(self, cells, colors=None, values=None):
         """
-        G = nx.Graph()
+        Changes some cells of the grid and repairs the solution.
+
+        Parameters:
+        -----------
+        cells: list[tuple[int]]
+            The cells (i, j) to change
+        colors: list[int]
+            The new color of each cell, None to keep the colors (or None for a single cell)
+        values: list[int]
+            The new value of each cell, None to keep the values (or None for a single cell)
 
-        # Add valid pairs with weights (inverted so low diff = high reward)
-        for (c1, c2) in self.grid.all_pairs():
-            if self.grid.valid_pair(c1, c2):
-                diff = abs(self.grid.value[c1[0]][c1[1]] - self.grid.value[c2[0]][c2[1]])
-                G.add_edge(c1, c2, weight=-diff)  # negative for max_weight = min_diff
+        Output:
+        -------
+        score: int
+            The score of the new solution
+        """
+        if self.matching is None:
+            raise Exception("The solver must be run before it is updated")
+        grid = self.grid
+        n, m = grid.n, grid.m
+        even, odd, cost = [], [], []
+        for k, (i, j) in enumerate(cells):
+            if grid.color_array[i, j] != BLACK:
+                self._total -= int(grid.value_array[i, j])
+            grid.set_cell(i, j, None if colors is None else colors[k], None if values is None else values[k])
+            if grid.color_array[i, j] != BLACK:
+                self._total += int(grid.value_array[i, j])
+            for i2, j2 in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+                if 0 <= i2 < n and 0 <= j2 < m:
+                    cell, neighbour = i * m + j, i2 * m + j2
+                    if (i + j) % 2 == 1:
+                        cell, neighbour = neighbour, cell
+                    even.append(cell)
+                    odd.append(neighbour)
+                    cost.append(self._pair_cost(cell, neighbour))
+        with self.profiler.phase("update") as phase:
+            self._cost += self.matching.update(even, odd, cost)
+            phase["cells"], phase["edges"] = len(cells), len(even)
+        self._pairs = None
+        return self.score()
 
-        self.pairs = list(nx.max_weight_matching(G, maxcardinality=True))
+    def score(self):
+        """
+        Returns the score of the current solution, kept up to date by run and update.
+        """
+        return self._total + self._cost
+
+
+class SolverMaxWeightMatching2(Solver):
+    """
+    Solver for the variant where two white cells (one even, one odd) can be paired even if they are not adjacent.
+    """
+
+    def run(self):
+        """
+        Run the optimal matching algorithm for the variant as a min cost flow.
+
+        The white pairs are never listed: the white cells are attached to a chain of nodes, one per
+        distinct white value in increasing order, where going from one node to the next costs the
+        difference of values. Sending one unit from an even white cell to an odd white cell through the
+        chain then costs exactly |v1 - v2|, so the graph has O(n * m) edges instead of O(W²).
+        Pairing two cells of values v1 and v2 changes the score by |v1 - v2| - v1 - v2, which is the cost
+        of the path source -> even cell -> ... -> odd cell -> sink, and flow is only sent while it is negative.
+        """
+        grid = self.grid
+        size = grid.n * grid.m
+        value = grid.value_array.ravel()
+        color = grid.color_array.ravel()
+        ids = np.arange(size)
+        i, j = np.divmod(ids, grid.m)
+        playable = color != BLACK
+        even_cells = ids[playable & ((i + j) % 2 == 0)]
+        odd_cells = ids[playable & ((i + j) % 2 == 1)]
+
+        white_even, white_odd = grid.white_cells()
+        chain_values = np.unique(value[np.concatenate((white_even, white_odd))])
+        chain = np.arange(size, size + len(chain_values))
+        source, sink = size + len(chain_values), size + len(chain_values) + 1
+
+        profiler = self.profiler
+        with profiler.phase("graph") as phase:
+            network = MinCostFlow(sink + 1)
+            network.add_edges(source, even_cells, 1, -value[even_cells])
+            network.add_edges(odd_cells, sink, 1, -value[odd_cells])
+
+            # Adjacent pairs involving a non-white cell, oriented from the even cell to the odd cell
+            src, dst, cost = grid.edges2()
+            src_is_even = (i[src] + j[src]) % 2 == 0
+            tail, head = np.where(src_is_even, src, dst), np.where(src_is_even, dst, src)
+            network.add_edges(tail, head, 1, cost)
+
+            # White cells attached to the value chain
+            rank = np.searchsorted(chain_values, value) + size
+            network.add_edges(white_even, rank[white_even], 1, 0)
+            network.add_edges(rank[white_odd], white_odd, 1, 0)
+            steps = np.diff(chain_values)
+            network.add_edges(chain[:-1], chain[1:], INFINITE_CAPACITY, steps)
+            network.add_edges(chain[1:], chain[:-1], INFINITE_CAPACITY, steps)
+            phase["cells"], phase["nodes"], phase["edges"] = size, network.num_nodes, network.num_edges
+
+        with profiler.phase("flow"):
+            network.run(source, sink)
+            flow = network.flow()
+
+        offset = len(even_cells) + len(odd_cells)
+        used = flow[offset:offset + len(tail)] > 0
+        pair_src, pair_dst = np.minimum(tail, head)[used].tolist(), np.maximum(tail, head)[used].tolist()
+        # The white cells using the chain are paired in increasing order of value on both sides,
+        # which is an optimal assignment between two sets of points on a line
+        offset += len(tail)
+        even_used = white_even[flow[offset:offset + len(white_even)] > 0].tolist()
+        offset += len(white_even)
+        odd_used = white_odd[flow[offset:offset + len(white_odd)] > 0].tolist()
+        for a, b in zip(even_used, odd_used):
+            pair_src.append(min(a, b))
+            pair_dst.append(max(a, b))
+
+        self.pairs = grid.pairs_from_ids(pair_src, pair_dst)
         return self.pairs
 
     def score(self):
         """
-        Return the total score for the optimal (Hungarian) solution.
+        Return the total score for the variant solution, the pairs being checked with the rules of the variant.
         """
-        return self.grid.score(self.pairs)
+        return self.grid.score(self.pairs, variant=True)
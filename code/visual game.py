@@ -8,9 +8,9 @@ Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mok
 """
 
 import pygame
-from grid import Grid
+from grid import Grid, ScoreTracker
 from solver import *
-from minmax import Minmax
+from minmax import Minmax, GameState
 data_path = "../input/"
 
 file_name = data_path + "grid06.in"
@@ -26,8 +26,10 @@ pygame.display.set_caption("Grid Pairing Game")
 font = pygame.font.SysFont(None, 28)
 
 # === Initialisation AI and solver ===
-AI = Minmax(grid)
+AI = Minmax(grid, time_budget=2)  # At most about 2 seconds per move of the AI
+ai_state = GameState(grid, AI.pairs)  # Position of the AI mode, updated at each pair
 solver = SolverMaxWeightMatching(grid)
+solo_tracker = ScoreTracker(grid)  # Score of the solo mode, updated at each pair
 
 # === Boutons ===
 button_terminer = pygame.Rect(10, grid.n * cell_size + 10, 150, 40)
@@ -131,11 +133,7 @@ while running:
         screen.fill((255, 255, 255))
         draw_grid()
 
-        def next_moves(grid, used_cells):
-            return [(c1, c2) for (c1, c2) in grid.all_pairs() if
-                    grid.valid_pair(c1, c2) and (c1 not in used_cells) and (c2 not in used_cells)]
-
-        game_ended = next_moves(grid, used_cells) == []
+        game_ended = ai_state.terminal()
 
         # Affichage des paires
         for pair in player1_pairs:
@@ -182,6 +180,7 @@ while running:
                             print(f"Paire valide Joueur {current_player} :", c1, c2)
                             paired_cells.append((c1, c2))
                             used_cells.update([c1, c2])
+                            ai_state.play((c1, c2))
                             player1_pairs.append((c1, c2))
                             current_player = 2
                         else:
@@ -192,6 +191,7 @@ while running:
                     (c1, c2) = AI.move(used_cells, player2_pairs, player1_pairs)
                     paired_cells.append((c1, c2))
                     used_cells.update([c1, c2])
+                    ai_state.play((c1, c2))
                     player2_pairs.append((c1, c2))
                     current_player = 1
 
@@ -286,6 +286,9 @@ while running:
             msg2 = font.render(f"Score optimal : {optimal_score}", True, pygame.Color("black"))
             screen.blit(msg1, (200, grid.n * cell_size + 10))
             screen.blit(msg2, (200, grid.n * cell_size + 40))
+        else:
+            msg_score = font.render(f"Score : {solo_tracker.score}", True, pygame.Color("blue"))
+            screen.blit(msg_score, (200, grid.n * cell_size + 10))
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -294,9 +297,7 @@ while running:
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if button_terminer.collidepoint(event.pos) and not game_ended:
                     # Score utilisateur
-                    user_solver = Solver(grid)
-                    user_solver.pairs = paired_cells
-                    user_score = user_solver.score()
+                    user_score = solo_tracker.score
 
                     # Score optimal
                     solver.run()
@@ -309,6 +310,7 @@ while running:
                         last_pair = paired_cells.pop()
                         used_cells.discard(last_pair[0])
                         used_cells.discard(last_pair[1])
+                        solo_tracker.remove(last_pair)
                         print("Paire annulée :", last_pair)
 
                 elif not game_ended:
@@ -323,6 +325,7 @@ while running:
                                 print("Paire valide :", c1, c2)
                                 paired_cells.append((c1, c2))
                                 used_cells.update([c1, c2])
+                                solo_tracker.add((c1, c2))
                             else:
                                 print("Paire invalide :", c1, c2)
                             selected_cells = []
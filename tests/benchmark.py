@@ -0,0 +1,200 @@
+"""
+benchmark.py — Performance Benchmarks and Regression Baselines
+---------------------------------------------------------------
+This script measures, for each bundled grid (input/grid*.in) and each solver of the batch runner:
+- the load time, the time to generate the pairs (Grid.edges) and the time to build the matching graph,
+- the solve time, the peak memory allocated while solving (tracemalloc) and the score.
+
+Run from the root folder:
+
+    python tests/benchmark.py --save      # measures and writes the baseline
+    python tests/benchmark.py             # measures and compares with the baseline
+    python tests/benchmark.py --scaling 1000 10000 100000 1000000 --save    # scaling curves on synthetic grids
+
+The comparison flags every score that changed, every time above its baseline by more than the tolerance (and by
+more than a few milliseconds, below which timings are noise) and every peak memory above its baseline by more than
+the tolerance. The script exits with status 1 if there is any regression.
+
+The scaling baseline stops at 1M cells. At 10M cells the variant solver alone allocates about 8 GB (806 MB at 1M
+cells, growing linearly) and runs for about 15 minutes per repetition, which is more than the machine the baseline
+is measured on can hold; --scaling 10000000 runs it where enough memory is available.
+
+Developed as part of ENSAE Paris Programming Project (2025) — Mohamed Iyed Mokline & Olivier de Boissieu
+"""
+
+# This will work if ran from the root folder (the folder in which there is the subfolder code/)
+import sys
+
+sys.path.append("code/")
+
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from batch import SOLVERS
+from generator import generate_grid
+from grid import Grid
+from matching import MinCostMatching
+
+BASELINE = "tests/benchmark_baseline.json"
+SCALING_BASELINE = "tests/benchmark_scaling_baseline.json"
+TOLERANCE = 0.5
+MIN_TIME_DIFFERENCE = 0.02
+
+
+def best_time(function, repeat):
+    """
+    Calls function repeat times and returns its last result and its best time in seconds.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def peak_memory(function):
+    """
+    Returns the peak memory in bytes allocated by a call of function.
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def build_graph(grid):
+    """
+    Builds the matching engine of the optimal solver, i.e. the bipartite graph of the valid pairs.
+    """
+    even, odd, cost = grid.bipartite_edges()
+    value = grid.value_array.ravel()
+    return MinCostMatching(grid.n * grid.m, even, odd, cost - value[even] - value[odd])
+
+
+def benchmark_file(file_name, solvers, repeat):
+    """
+    Measures one grid file with every solver in solvers.
+
+    Output:
+    -------
+    result: dict
+        {"load_time", "pairs_time", "graph_time", "solvers": {name: {"solve_time", "peak_memory", "score"}}}
+    """
+    grid, load_time = best_time(lambda: Grid.grid_from_file(file_name, read_values=True), repeat)
+    _, pairs_time = best_time(grid.edges, repeat)
+    _, graph_time = best_time(lambda: build_graph(grid), repeat)
+    result = {"load_time": load_time, "pairs_time": pairs_time, "graph_time": graph_time, "solvers": {}}
+    for name in solvers:
+        solver_class, options = SOLVERS[name]
+
+        def solve():
+            solver = solver_class(grid, **options)
+            solver.run()
+            return solver.score()
+
+        score, solve_time = best_time(solve, repeat)
+        result["solvers"][name] = {"solve_time": solve_time, "peak_memory": peak_memory(solve), "score": score}
+    return result
+
+
+def synthetic_file(cells, directory, seed=0):
+    """
+    Writes to directory the seeded synthetic grid of about cells cells (with two times more columns than lines, as
+    the bundled grids) and returns its name and its file name.
+    """
+    n = max(1, round((cells / 2) ** 0.5))
+    m = max(1, cells // n)
+    name = f"synthetic_{n}x{m}_seed{seed}"
+    file_name = os.path.join(directory, name + ".in")
+    generate_grid(n, m, seed).to_file(file_name)
+    return name, file_name
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the list of regressions of results with respect to baseline (both as returned by benchmark_file,
+    by file name), as messages.
+    """
+    def slower(new, old):
+        return new > old * (1 + tolerance) and new - old > MIN_TIME_DIFFERENCE
+
+    regressions = []
+    for file_name, result in results.items():
+        if file_name not in baseline:
+            continue
+        old = baseline[file_name]
+        for key in ("load_time", "pairs_time", "graph_time"):
+            if slower(result[key], old[key]):
+                regressions.append(f"{file_name}: {key} {old[key]:.4f}s -> {result[key]:.4f}s")
+        for name, measures in result["solvers"].items():
+            if name not in old["solvers"]:
+                continue
+            previous = old["solvers"][name]
+            if measures["score"] != previous["score"]:
+                regressions.append(f"{file_name} {name}: score {previous['score']} -> {measures['score']}")
+            if slower(measures["solve_time"], previous["solve_time"]):
+                regressions.append(f"{file_name} {name}: solve_time "
+                                   f"{previous['solve_time']:.4f}s -> {measures['solve_time']:.4f}s")
+            if measures["peak_memory"] > previous["peak_memory"] * (1 + tolerance):
+                regressions.append(f"{file_name} {name}: peak_memory "
+                                   f"{previous['peak_memory']} -> {measures['peak_memory']} bytes")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solvers on the bundled grids.")
+    parser.add_argument("files", nargs="*", help="grid files (input/grid*.in by default)")
+    parser.add_argument("--solvers", nargs="+", default=sorted(SOLVERS), choices=sorted(SOLVERS))
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs, the best time is kept")
+    parser.add_argument("--baseline", default=None, help="baseline file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="relative tolerance on times and memory")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--scaling", type=int, nargs="+", metavar="CELLS",
+                        help="measure seeded synthetic grids of about these numbers of cells instead of files")
+    args = parser.parse_args(argv)
+    if args.baseline is None:
+        args.baseline = SCALING_BASELINE if args.scaling else BASELINE
+
+    results = {}
+    print(f"{'file':<28}{'solver':<18}{'load':>9}{'pairs':>9}{'graph':>9}{'solve':>9}{'memory':>12}{'score':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        if args.scaling:
+            files = [synthetic_file(cells, directory) for cells in args.scaling]
+        else:
+            files = [(file_name, file_name) for file_name in args.files or sorted(glob.glob("input/grid*.in"))]
+        for name, file_name in files:
+            result = benchmark_file(file_name, args.solvers, args.repeat)
+            results[name] = result
+            for solver, measures in result["solvers"].items():
+                print(f"{name:<28}{solver:<18}{result['load_time']:>9.4f}{result['pairs_time']:>9.4f}"
+                      f"{result['graph_time']:>9.4f}{measures['solve_time']:>9.4f}{measures['peak_memory']:>12}"
+                      f"{measures['score']:>9}")
+
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=1, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline {args.baseline}, run with --save to create it")
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print("REGRESSION", regression)
+    print(f"{len(regressions)} regression(s) with a tolerance of {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
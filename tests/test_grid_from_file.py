@@ -13,6 +13,7 @@ It tests:
   • SolverMatching (max flow)
   • SolverMaxWeightMatching (Hungarian)
   • SolverMaxWeightMatching2 (Hungarian variant)
+- The batch runner and the regression check of the benchmarks
 
 Each test checks algorithmic correctness across a wide set of `.in` input files.
 """
@@ -21,11 +22,25 @@ Each test checks algorithmic correctness across a wide set of `.in` input files.
 import sys
 
 sys.path.append("code/")
+sys.path.append("tests/")
 
 # Modified file configuration in Pycharm to set working directory to ensae-prog25, use "Python tests" instead
 
+import json
+import os
+import tempfile
 import unittest
-from grid import Grid
+import numpy as np
+import networkx as nx
+import benchmark
+from batch import grid_files, solve_files
+from generator import generate_grid
+from grid import Grid, ScoreTracker, convert_to_binary_file
+from matching import MinCostMatching
+from endgame import Endgame, canonical
+from mcts import MCTS
+from minmax import Minmax, GameState, Bitboard
+from profiling import Profiler, NULL_PROFILER
 from solver import *
 
 
@@ -51,6 +66,73 @@ class Test_GridLoading(unittest.TestCase):
         self.assertEqual(grid.color, [[0, 4, 3], [2, 1, 0]])
         self.assertEqual(grid.value, [[5, 8, 4], [11, 1, 3]])
 
+    def test_grid1_arrays(self):
+        grid = Grid.grid_from_file("input/grid01.in", read_values=True)
+        self.assertEqual(grid.color_array.dtype, np.int8)
+        self.assertEqual(grid.color_array.shape, (2, 3))
+        self.assertEqual(grid.value_array.tolist(), [[5, 8, 4], [11, 1, 3]])
+        self.assertEqual(grid.forbidden_mask().tolist(), [[False, True, False], [False, False, False]])
+
+    def test_bulk_loading_matches_line_reader(self):
+        for name in ("grid05", "grid17", "grid21", "grid27"):
+            for read_values in (True, False):
+                grid = Grid.grid_from_file(f"input/{name}.in", read_values=read_values)
+                expected = Grid._grid_from_file_by_line(f"input/{name}.in", read_values=read_values)
+                self.assertEqual(grid.color, expected.color)
+                self.assertEqual(grid.value, expected.value)
+
+    def test_malformed_files(self):
+        cases = {"2 3\n0 0 0\n0 0\n1 2 3\n4 5 6\n": "Format incorrect",
+                 "2 3\n0 0 0\n0 5 0\n1 2 3\n4 5 6\n": "Invalid color",
+                 "2 3\n0 0 0\n0 0 0\n1 2 3\n": "Format incorrect",
+                 "2 3\n0 0 0\n0 0 0\n1 2 3\n4 5 99999999999999999999\n": "Format incorrect"}
+        with tempfile.TemporaryDirectory() as folder:
+            file_name = os.path.join(folder, "grid.in")
+            for content, message in cases.items():
+                with open(file_name, "w") as file:
+                    file.write(content)
+                with self.assertRaisesRegex(Exception, message):
+                    Grid.grid_from_file(file_name, read_values=True)
+            with open(file_name, "w") as file:
+                file.write("2 3\n0 0 0\n0 x 0\n")
+            with self.assertRaises(ValueError):
+                Grid.grid_from_file(file_name, read_values=False)
+            with open(file_name, "w") as file:
+                file.write("1 2\n0 0\n9223372036854775807 -9223372036854775808\n")
+            self.assertEqual(Grid.grid_from_file(file_name).value, [[2 ** 63 - 1, -2 ** 63]])
+
+    def test_generated_grid(self):
+        grid = generate_grid(30, 40, seed=3, black_density=0.5, color_weights=(1, 0, 0, 1), values="geometric")
+        same = generate_grid(30, 40, seed=3, black_density=0.5, color_weights=(1, 0, 0, 1), values="geometric")
+        np.testing.assert_array_equal(grid.color_array, same.color_array)
+        np.testing.assert_array_equal(grid.value_array, same.value_array)
+        self.assertTrue(set(np.unique(grid.color_array).tolist()) <= {0, 3, 4})
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "grid.in")
+            grid.to_file(file_name, chunk_rows=7)
+            loaded = Grid.grid_from_file(file_name, read_values=True)
+        np.testing.assert_array_equal(loaded.color_array, grid.color_array)
+        np.testing.assert_array_equal(loaded.value_array, grid.value_array)
+        with self.assertRaisesRegex(Exception, "Invalid color distribution"):
+            generate_grid(3, 4, seed=0, color_weights=(0, 0, 0, 0))
+        self.assertTrue(np.all(generate_grid(3, 4, black_density=1, color_weights=(0, 0, 0, 0)).color_array == 4))
+
+    def test_binary_file(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_name = os.path.join(folder, "grid05.bin")
+            convert_to_binary_file("input/grid05.in", file_name)
+            grid = Grid.grid_from_binary_file(file_name)
+            expected = Grid.grid_from_file("input/grid05.in")
+            self.assertEqual((grid.n, grid.m), (4, 8))
+            self.assertEqual(grid.color, expected.color)
+            self.assertEqual(grid.value, expected.value)
+            self.assertFalse(grid.value_array.flags.owndata)
+            del grid
+            with open(file_name, "r+b") as file:
+                file.write(b"NOTAGRID")
+            with self.assertRaisesRegex(Exception, "Format incorrect"):
+                Grid.grid_from_binary_file(file_name)
+
 
 class Test_GridMethods(unittest.TestCase):
     def test_isforbidden(self):
@@ -78,6 +160,67 @@ class Test_GridMethods(unittest.TestCase):
         pairs = set(grid.all_pairs())
         self.assertSetEqual(pairs, {((0, 0), (1, 0)), ((0, 2), (1, 2)), ((1, 0), (1, 1)), ((1, 1), (1, 2))})
 
+    def test_allpairs_matches_color_check(self):
+        grid = Grid.grid_from_file("input/grid05.in", read_values=True)
+        expected = set()
+        for i in range(grid.n):
+            for j in range(grid.m):
+                for (k, l) in ((i, j + 1), (i + 1, j)):
+                    if k < grid.n and l < grid.m and grid.color_check((i, j), (k, l)):
+                        expected.add(((i, j), (k, l)))
+        self.assertSetEqual(set(grid.all_pairs()), expected)
+
+    def test_edges(self):
+        grid = Grid.grid_from_file("input/grid01.in", read_values=True)
+        src, dst, cost = grid.edges()
+        edges = set(zip(src.tolist(), dst.tolist(), cost.tolist()))
+        self.assertSetEqual(edges, {(0, 3, 6), (2, 5, 1), (3, 4, 10), (4, 5, 2)})
+        indptr, indices, cost = grid.adjacency()
+        self.assertEqual(indptr.tolist(), [0, 1, 1, 2, 4, 6, 8])
+        self.assertEqual(sorted(indices[indptr[4]:indptr[5]].tolist()), [3, 5])
+
+    def test_white_cells(self):
+        grid = Grid.grid_from_file("input/grid00.in", read_values=True)
+        even, odd = grid.white_cells()
+        self.assertEqual(even.tolist(), [4, 2, 0])
+        self.assertEqual(odd.tolist(), [5, 1, 3])
+        self.assertTrue(grid.valid_pair2((0, 0), (1, 2)))
+        self.assertFalse(grid.valid_pair2((0, 0), (1, 1)))
+        self.assertEqual(len(grid.all_pairs2()), 9)
+
+    def test_score(self):
+        grid = Grid.grid_from_file("input/grid00.in", read_values=True)
+        self.assertEqual(grid.score([]), 32)
+        self.assertEqual(grid.score([((0, 0), (0, 1)), ((1, 2), (0, 2))]), 3 + 1 + 11 + 1)
+        with self.assertRaisesRegex(Exception, "Invalid pair"):
+            grid.score([((0, 0), (1, 1))])
+        with self.assertRaisesRegex(Exception, "Cell used twice"):
+            grid.score([((0, 0), (0, 1)), ((0, 1), (0, 2))])
+        self.assertEqual(grid.score([((0, 0), (1, 2))], variant=True), 2 + 8 + 4 + 11 + 1)
+
+    def test_score_tracker(self):
+        grid = Grid.grid_from_file("input/grid05.in", read_values=True)
+        tracker = ScoreTracker(grid)
+        pairs, _ = SolverGreedy(grid).run()
+        for pair in pairs:
+            tracker.add(pair)
+        self.assertEqual(tracker.score, grid.score(pairs))
+        tracker.remove(pairs[0])
+        self.assertEqual(tracker.score, grid.score(pairs[1:]))
+        with self.assertRaisesRegex(Exception, "Cell used twice"):
+            tracker.add(pairs[1])
+
+    def test_components(self):
+        grid = Grid.grid_from_file("input/grid05.in", read_values=True)
+        label = grid.components()
+        src, dst, _ = grid.edges()
+        graph = nx.Graph()
+        graph.add_nodes_from(range(grid.n * grid.m))
+        graph.add_edges_from(zip(src.tolist(), dst.tolist()))
+        for component in nx.connected_components(graph):
+            self.assertEqual(len(set(label[list(component)].tolist())), 1)
+        self.assertEqual(len(np.unique(label)), nx.number_connected_components(graph))
+
 
 class Test_SolverGreedy(unittest.TestCase):
     def test_Solver(self):
@@ -91,6 +234,52 @@ class Test_SolverGreedy(unittest.TestCase):
         pairs, score = solver.run()
         self.assertEqual(score, 41)
 
+    def test_improvement_passes(self):
+        grid = Grid.grid_from_file("input/grid05.in", read_values=True)
+        pairs, score = SolverGreedy(grid, improvement_passes=10).run()
+        self.assertEqual(score, 35)
+        self.assertEqual(grid.score(pairs), score)
+
+        grid = Grid.grid_from_file("input/grid21.in", read_values=True)
+        _, greedy_score = SolverGreedy(grid).run()
+        pairs, score = SolverGreedy(grid, improvement_passes=10).run()
+        self.assertEqual(grid.score(pairs), score)
+        self.assertLess(score, greedy_score)
+
+
+class Test_SolverPathGrowing(unittest.TestCase):
+    def test_Solver(self):
+        for name in ("grid05", "grid21"):
+            grid = Grid.grid_from_file(f"input/{name}.in", read_values=True)
+            solver = SolverPathGrowing(grid)
+            solver.run()
+            optimal = SolverMaxWeightMatching(grid)
+            optimal.run()
+            self.assertLessEqual(solver.lower_bound(), optimal.score())
+            self.assertLessEqual(optimal.score(), solver.score())
+        self.assertEqual(SolverPathGrowing(grid).approximation_ratio, 0.5)
+
+
+class Test_SolverAnytime(unittest.TestCase):
+    def test_Solver(self):
+        grid = Grid.grid_from_file("input/grid21.in", read_values=True)
+        reports = []
+        solver = SolverAnytime(grid, 0, callback=lambda score, bound: reports.append((score, bound)))
+        with self.assertRaisesRegex(Exception, "not been run"):
+            solver.gap()
+        pairs = solver.run()
+        self.assertEqual(reports, [(1850, solver.lower_bound())])
+        self.assertEqual(grid.score(pairs), 1850)
+        self.assertFalse(solver.optimal)
+
+        solver = SolverAnytime(grid, 60, callback=lambda score, bound: reports.append((score, bound)))
+        pairs = solver.run()
+        self.assertTrue(solver.optimal)
+        self.assertEqual(grid.score(pairs), 1686)
+        self.assertEqual(solver.gap(), 0)
+        scores = [score for score, _ in reports[1:]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
 
 class Test_SolverMatching(unittest.TestCase):
     def test_Solver02(self):
@@ -111,6 +300,18 @@ class Test_SolverMatching(unittest.TestCase):
         score = solver.run()
         self.assertEqual(score, 4)
 
+    def test_Solver21(self):
+        grid = Grid.grid_from_file("input/grid21.in", read_values=False)
+        solver = SolverMatching(grid)
+        score = solver.run()
+        cells = [c for pair in solver.pairs for c in pair]
+        self.assertEqual(len(cells), len(set(cells)))
+        self.assertTrue(all(grid.valid_pair(c1, c2) for c1, c2 in solver.pairs))
+        optimal = SolverMaxWeightMatching(grid)
+        optimal.run()
+        self.assertEqual(len(solver.pairs), len(optimal.pairs))
+        self.assertEqual(score, 20000 - 9938 - 2 * len(solver.pairs))
+
 
 class Test_SolverHungarian(unittest.TestCase):
     def test_Solver02(self):
@@ -134,6 +335,80 @@ class Test_SolverHungarian(unittest.TestCase):
         score = solver.score()
         self.assertEqual(score, 4)
 
+    def test_parallel_components(self):
+        grid = Grid.grid_from_file("input/grid21.in", read_values=True)
+        solver = SolverMaxWeightMatching(grid)
+        solver.run()
+        # The pairs of grid21 are spread over many small components, which are packed into one batch per process
+        parallel = SolverMaxWeightMatching(grid, processes=2)
+        parallel.profiler = Profiler()
+        parallel.run()
+        self.assertEqual(parallel.score(), solver.score())
+        components = parallel.profiler.phases[1]
+        self.assertGreater(components["components"], 100)
+        self.assertEqual(components["batches"], 2)
+        serial = SolverMaxWeightMatching(grid, processes=1)
+        serial.profiler = Profiler()
+        serial.run()
+        self.assertEqual(serial.profiler.phases[1]["batches"], 0)
+
+
+class Test_SolverDynamic(unittest.TestCase):
+    def test_same_score_as_full_solve(self):
+        grid = Grid.grid_from_file("input/grid05.in", read_values=True)
+        solver = SolverDynamic(grid)
+        solver.run()
+        self.assertEqual(solver.score(), 35)
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            cells = [(int(rng.integers(grid.n)), int(rng.integers(grid.m))) for _ in range(2)]
+            colors = [int(c) for c in rng.integers(0, 5, 2)]
+            values = [int(v) for v in rng.integers(1, 20, 2)]
+            score = solver.update(cells, colors, values)
+            optimal = SolverMaxWeightMatching(grid)
+            optimal.run()
+            self.assertEqual(score, optimal.score())
+            self.assertEqual(grid.score(solver.pairs), score)
+
+
+class Test_MinCostMatching(unittest.TestCase):
+    def reference_cost(self, grid):
+        # General max weight matching where a pair (v1, v2) saves v1 + v2 - |v1 - v2| on the score
+        src, dst, cost = grid.edges()
+        value = grid.value_array.ravel()
+        G = nx.Graph()
+        G.add_weighted_edges_from(zip(src.tolist(), dst.tolist(), (value[src] + value[dst] - cost).tolist()))
+        return -sum(G[a][b]["weight"] for a, b in nx.max_weight_matching(G))
+
+    def test_same_optimum_as_networkx(self):
+        for name in ("grid05", "grid14", "grid17", "grid19"):
+            grid = Grid.grid_from_file(f"input/{name}.in", read_values=True)
+            src, dst, cost = grid.edges()
+            value = grid.value_array.ravel()
+            i, j = np.divmod(src, grid.m)
+            even = np.where((i + j) % 2 == 0, src, dst)
+            odd = np.where((i + j) % 2 == 0, dst, src)
+            engine = MinCostMatching(grid.n * grid.m, even, odd, cost - value[src] - value[dst])
+            self.assertEqual(engine.solve(), self.reference_cost(grid))
+            left, right = engine.pairs()
+            self.assertEqual(len(set(left.tolist()) | set(right.tolist())), 2 * len(left))
+
+    def test_update(self):
+        # Perfect matching between 0..5 and 6..11, updated locally or, with a limit of 0, solved again
+        rng = np.random.default_rng(0)
+        left, right = np.divmod(np.arange(36), 6)
+        right = right + 6
+        cost = rng.integers(-20, 0, size=36)
+        for limit in (None, 0):
+            engine = MinCostMatching(12, left, right, cost, perfect=True)
+            total = engine.solve()
+            for _ in range(20):
+                changed = rng.choice(36, size=3, replace=False)
+                cost[changed] = rng.integers(-20, 0, size=3)
+                total += engine.update(left[changed], right[changed], cost[changed], limit=limit)
+                self.assertEqual(total, engine.cost())
+                self.assertEqual(total, MinCostMatching(12, left, right, cost, perfect=True).solve())
+
 
 class Test_SolverVariante(unittest.TestCase):
     def test_Solver00(self):
@@ -157,6 +432,220 @@ class Test_SolverVariante(unittest.TestCase):
         score = solver.score()
         self.assertEqual(score, 3)
 
+    def test_Solver17(self):
+        grid = Grid.grid_from_file("input/grid17.in", read_values=True)
+        solver = SolverMaxWeightMatching2(grid)
+        pairs = solver.run()
+        cells = [c for pair in pairs for c in pair]
+        self.assertEqual(len(cells), len(set(cells)))
+        self.assertTrue(all(grid.valid_pair2(c1, c2) for c1, c2 in pairs))
+        self.assertEqual(solver.score(), 228)
+
+
+class Test_Profiler(unittest.TestCase):
+    def test_phases(self):
+        finished = []
+        profiler = Profiler(memory=True, hook=lambda record: finished.append(record["name"]))
+        grid = Grid.grid_from_file("input/grid05.in", read_values=True, profiler=profiler)
+        solver = SolverMaxWeightMatching(grid)
+        self.assertIs(solver.profiler, NULL_PROFILER)
+        with NULL_PROFILER.phase("pairs") as phase:
+            phase["edges"] = 1
+        with NULL_PROFILER.phase("pairs") as phase:
+            self.assertEqual(phase, {})
+        solver.profiler = profiler
+        solver.run()
+        self.assertEqual(finished, ["read", "parse", "pairs", "components", "matching"])
+        pairs_phase = profiler.phases[2]
+        self.assertEqual((pairs_phase["cells"], pairs_phase["edges"]), (32, len(grid.edges()[0])))
+        self.assertEqual(profiler.phases[-1]["pairs"], len(solver.pairs))
+        self.assertTrue(all(record["time"] >= 0 and record["peak_memory"] >= 0 for record in profiler.phases))
+        self.assertEqual(set(profiler.totals()), set(finished))
+
+
+class Test_Batch(unittest.TestCase):
+    def test_solve_files(self):
+        files = grid_files(["input/grid0[0-5].in"])
+        self.assertEqual(files, [f"input/grid0{k}.in" for k in range(6)])
+        with tempfile.TemporaryDirectory() as directory:
+            malformed = os.path.join(directory, "malformed.in")
+            with open(malformed, "w") as file:
+                file.write("2 3\n0 0\n")
+            results = list(solve_files(files + [malformed], "optimal", processes=2, window=3))
+        self.assertEqual([result["file"] for result in results], files + [malformed])
+        self.assertEqual([result["score"] for result in results[:6]], [12, 8, 1, 2, 4, 35])
+        self.assertEqual(results[0]["pairs"], 3)
+        self.assertEqual(results[-1]["error"], "Format incorrect")
+
+
+class Test_Benchmark(unittest.TestCase):
+    @staticmethod
+    def result(time=1.0, memory=1000, score=10):
+        return {"load_time": 0.5, "pairs_time": 0.5, "graph_time": 0.5,
+                "solvers": {"greedy": {"solve_time": time, "peak_memory": memory, "score": score}}}
+
+    def test_compare(self):
+        baseline = {"grid": self.result()}
+        self.assertEqual(benchmark.compare({"grid": self.result(time=1.4, memory=1400)}, baseline, 0.5), [])
+        # Slower beyond the tolerance, but by less than MIN_TIME_DIFFERENCE: timing noise
+        small = {"grid": dict(self.result(), load_time=0.01)}
+        self.assertEqual(benchmark.compare({"grid": dict(self.result(), load_time=0.025)}, small, 0.5), [])
+        regressions = benchmark.compare({"grid": self.result(time=1.6, memory=1600, score=11)}, baseline, 0.5)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(any("score 10 -> 11" in message for message in regressions))
+        self.assertTrue(any("solve_time" in message for message in regressions))
+        self.assertTrue(any("peak_memory" in message for message in regressions))
+        slower = {"grid": dict(self.result(), graph_time=0.8)}
+        self.assertEqual(len(benchmark.compare(slower, baseline, 0.5)), 1)
+        # Files and solvers missing from the baseline are not compared
+        self.assertEqual(benchmark.compare({"other": self.result(score=0)}, baseline, 0.5), [])
+
+    def test_exit_status(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, "baseline.json")
+            args = ["input/grid00.in", "--solvers", "greedy", "--repeat", "1", "--baseline", baseline]
+            self.assertEqual(benchmark.main(args + ["--save"]), 0)
+            self.assertEqual(benchmark.main(args + ["--tolerance", "1000"]), 0)
+            with open(baseline) as file:
+                results = json.load(file)
+            results["input/grid00.in"]["solvers"]["greedy"]["score"] += 1
+            with open(baseline, "w") as file:
+                json.dump(results, file)
+            self.assertEqual(benchmark.main(args + ["--tolerance", "1000"]), 1)
+
+
+class Test_Minmax(unittest.TestCase):
+    def test_alphabeta_move(self):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            color = rng.choice(5, size=(3, 3), p=[0.4, 0.15, 0.15, 0.15, 0.15])
+            grid = Grid(3, 3, color.tolist(), rng.integers(1, 10, size=(3, 3)).tolist())
+            AI = Minmax(grid)
+            used_cells, AIpairs, PersonPairs = set(), [], []
+            while not AI.terminal(used_cells):
+                move = AI.move(set(used_cells), list(AIpairs), list(PersonPairs))
+                self.assertEqual(move, AI.move_minimax(set(used_cells), list(AIpairs), list(PersonPairs)))
+                AIpairs.append(move)
+                used_cells.update(move)
+                AIpairs, PersonPairs = PersonPairs, AIpairs
+            self.assertIsNone(AI.move(used_cells, AIpairs, PersonPairs))
+
+    def test_transposition_table(self):
+        grid = Grid.grid_from_file("input/grid01.in", read_values=True)
+        reference = Minmax(grid).move(set(), [], [])
+        AI = Minmax(grid, table_size=8)
+        self.assertEqual(AI.move(set(), [], []), reference)
+        self.assertEqual(AI.move(set(), [], []), reference)
+        self.assertTrue(0 < len(AI.table) <= 8)
+
+    def test_time_budget(self):
+        grid = Grid.grid_from_file("input/grid05.in", read_values=True)
+        AI = Minmax(grid, time_budget=10)
+        move = AI.move({(0, 0)}, [], [])
+        self.assertEqual(move, Minmax(grid).move({(0, 0)}, [], []))
+        self.assertTrue(0 < AI.completed_depth < 100)
+        rng = np.random.default_rng(1)
+        large = Grid(20, 20, rng.choice(4, size=(20, 20)).tolist(), rng.integers(1, 10, size=(20, 20)).tolist())
+        AI = Minmax(large, time_budget=0.2)
+        move = AI.move(set(), [], [])
+        self.assertIn(move, AI.pairs)
+
+    def test_parallel_search(self):
+        grid = Grid.grid_from_file("input/grid05.in", read_values=True)
+        used_cells = {(0, 0), (1, 0), (0, 7)}
+        move = Minmax(grid).move(used_cells, [], [])
+        with Minmax(grid, processes=2) as AI:
+            self.assertEqual(AI.move(used_cells, [], []), move)
+            pool = AI.pool
+            self.assertEqual(AI.move(used_cells, [], []), move)
+            self.assertIs(AI.pool, pool)
+        self.assertIsNone(AI.pool)
+        with Minmax(grid, processes=3, table_size=16) as AI:
+            self.assertEqual(AI.move(used_cells, [], []), move)
+
+    def test_game_state(self):
+        grid = Grid.grid_from_file("input/grid02.in", read_values=True)
+        AI = Minmax(grid)
+        state = GameState(grid)
+        board = Bitboard(grid)
+        played = []
+        while not state.terminal():
+            self.assertEqual(state.moves(), AI.next_moves(state.used))
+            self.assertEqual([AI.pairs[k] for k in board.moves()], state.moves())
+            played.append(state.moves()[-1])
+            state.play(played[-1])
+            board.play(AI.pairs.index(played[-1]), len(played) % 2 == 1)
+        self.assertTrue(AI.terminal(state.used) and board.terminal())
+        self.assertRaises(Exception, state.play, played[0])
+        self.assertEqual(board.ai_score, AI.compute_score(played[::2]))
+        self.assertEqual(board.person_score, AI.compute_score(played[1::2]))
+        state.undo(played.pop())
+        self.assertEqual(state.moves(), AI.next_moves(state.used))
+        board.reset(state.used)
+        self.assertEqual([AI.pairs[k] for k in board.moves()], state.moves())
+
+
+class Test_Endgame(unittest.TestCase):
+    def test_canonical(self):
+        component = [(((0, 1), (0, 2)), 3), (((0, 2), (1, 2)), 1)]
+        rotated = [(((4, 5), (5, 5)), 3), (((5, 5), (5, 6)), 1)]
+        reflected = [(((2, 7), (2, 8)), 1), (((2, 8), (3, 8)), 3)]
+        other_costs = [(((0, 1), (0, 2)), 3), (((0, 2), (1, 2)), 2)]
+        self.assertEqual(canonical(component), canonical(rotated))
+        self.assertEqual(canonical(component), canonical(reflected))
+        self.assertNotEqual(canonical(component), canonical(other_costs))
+        self.assertEqual(canonical([(((3, 3), (4, 3)), 2)]), canonical([(((0, 0), (0, 1)), 2)]))
+
+    def test_solve(self):
+        # The components are not independent: the AI plays the pair of cost 0 and leaves the other to the opponent
+        grid = Grid(1, 5, [[0, 0, 4, 0, 0]], [[1, 6, 1, 3, 3]])
+        AI = Minmax(grid, endgame_cells=0)
+        endgame = Endgame(AI.board, AI.pairs)
+        masks = endgame.split(AI.board.active())
+        self.assertEqual(len(masks), 2)
+        self.assertEqual(endgame.solve(masks, True), 5)
+        self.assertEqual(endgame.solve(masks, False), -5)
+        rng = np.random.default_rng(6)
+        color = rng.choice(5, size=(3, 5), p=[0.25, 0.15, 0.15, 0.15, 0.3])
+        grid = Grid(3, 5, color.tolist(), rng.integers(1, 10, size=(3, 5)).tolist())
+        AI = Minmax(grid, endgame_cells=0)
+        endgame = Endgame(AI.board, AI.pairs)
+        masks = endgame.split(AI.board.active())
+        self.assertGreater(len(masks), 1)
+        self.assertEqual(endgame.solve(masks, True), AI.minimax(True, 0, [], [], set()))
+        self.assertEqual(endgame.solve(masks, False), AI.minimax(False, 0, [], [], set()))
+        small = Endgame(AI.board, AI.pairs, memo_size=4)
+        self.assertEqual(small.solve(masks, True), AI.minimax(True, 0, [], [], set()))
+        self.assertLessEqual(max(len(small.bounds), len(small.moves), len(small.forms)), 4)
+        self.assertEqual(Minmax(grid).move(set(), [], []), AI.move_minimax(set(), [], []))
+
+
+class Test_MCTS(unittest.TestCase):
+    def test_move(self):
+        rng = np.random.default_rng(0)
+        grid = Grid(6, 6, rng.choice(4, size=(6, 6)).tolist(), rng.integers(1, 10, size=(6, 6)).tolist())
+        AI = MCTS(grid, iterations=200, seed=1)
+        move = AI.move(set(), [], [])
+        self.assertIn(move, grid.all_pairs())
+        self.assertEqual(MCTS(grid, iterations=200, seed=1).move(set(), [], []), move)
+        # The opponent plays the most visited answer, the search restarts from its node
+        played = next(child for child in AI.root.children if AI.pairs[child.move] == move)
+        answer = max(played.children, key=lambda child: child.visits)
+        used_cells = set(move) | set(AI.pairs[answer.move])
+        AI.move(used_cells, [move], [AI.pairs[answer.move]])
+        self.assertIs(AI.root, answer)
+        self.assertEqual(AI.root.visits, answer.visits)
+        self.assertGreater(answer.visits, 200)
+
+    def test_terminal(self):
+        grid = Grid.grid_from_file("input/grid00.in", read_values=True)
+        AI = MCTS(grid, iterations=None, time_budget=0.05)
+        used_cells = {cell for pair in grid.all_pairs() for cell in pair}
+        self.assertTrue(AI.terminal(used_cells))
+        self.assertIsNone(AI.move(used_cells, [], []))
+        self.assertFalse(AI.terminal(set()))
+        self.assertIn(AI.move(set(), [], []), grid.all_pairs())
+
 
 if __name__ == '__main__':
     unittest.main()